@@ -0,0 +1,234 @@
+# Benchmarks del conversor de RegEx a NFA y a DFA.
+# Mide por separado cada etapa de la compilación y la velocidad de los matches sobre un corpus fijo de expresiones,
+# escribe los resultados en JSON y los puede comparar contra una corrida anterior guardada (baseline).
+#
+# Uso: python benchmark.py [--repeat 7] [--min-time 0.05] [--output results.json] [--baseline baseline.json] [--threshold 0.25] [--retries 2] [--filter exponential]
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import grafo
+
+ALFABETO = "abcdefgh"
+SEED = 2024     # Semilla fija para que las entradas de los matches sean siempre las mismas.
+MIN_TIME = 0.05     # Cada etapa se repite hasta sumar al menos este tiempo (en segundos) y se reporta el tiempo por llamada.
+NOISE_FLOOR = 0.0002    # Tiempos por llamada (en segundos) por debajo de este valor no se comparan, son puro ruido.
+
+
+# ================================ Corpus ================================
+
+
+def long_literal(n):    # Una sola palabra larga: abcdefghabcd...
+    return (ALFABETO * (n // len(ALFABETO) + 1))[:n]
+
+def deep_nesting(n):    # Alternativas y concatenaciones anidadas n niveles: (((a|b)c|d)e|f)...
+    regex = "a"
+    for i in range(0, n):
+        regex = "(" + regex + "|" + ALFABETO[(i + 1) % len(ALFABETO)] + ")" + ALFABETO[(i + 2) % len(ALFABETO)]
+    return regex
+
+def nested_stars(n):    # Estrellas y más anidados: ((((a)*b)+c)*d)+...
+    regex = "a"
+    for i in range(0, n):
+        regex = "(" + regex + ")" + ("*" if i % 2 == 0 else "+") + ALFABETO[(i + 1) % len(ALFABETO)]
+    return regex
+
+def wide_alternation(n):    # n palabras de 3 letras separadas por |.
+    palabras = []
+    for i in range(0, n):
+        palabras.append(ALFABETO[i % 8] + ALFABETO[(i * 3) % 8] + ALFABETO[(i * 5 + i // 8) % 8])
+    return "|".join(palabras)
+
+def exponential(n):     # La familia clásica (a|b)*a(a|b){n}, cuyo DFA mínimo tiene 2^(n+1) estados.
+    return "(a|b)*a" + "(a|b)" * n
+
+CORPUS = [
+    ("long_literal_500", long_literal(500)),
+    ("deep_nesting_40", deep_nesting(40)),
+    ("nested_stars_20", nested_stars(20)),
+    ("wide_alternation_200", wide_alternation(200)),
+    ("exponential_4", exponential(4)),
+    ("exponential_8", exponential(8)),
+    ("exponential_10", exponential(10)),
+]
+
+
+# ================================ Etapas ================================
+
+
+def time_stage(funcion, min_time):  # Segundos por llamada de funcion: se llama en un ciclo que duplica las llamadas hasta tardar al menos min_time en total, así las etapas cortas no quedan por debajo de la resolución del reloj. Igual que timeit, el recolector de basura se apaga mientras se mide.
+    numero = 1
+    activo = gc.isenabled()
+    gc.disable()
+    try:
+        while True:
+            inicio = time.perf_counter()
+            for _ in range(0, numero):
+                funcion()
+            total = time.perf_counter() - inicio
+            if total >= min_time:
+                return total / numero
+            numero *= 2
+    finally:
+        if activo:
+            gc.enable()
+
+def calibration():  # Trabajo fijo en Python puro (diccionarios, listas y strings, como el resto de las etapas) que mide qué tan rápida está la máquina en este momento.
+    tabla = {}
+    for i in range(0, 20000):
+        tabla[str(i)] = [i, i * 3 % 7]
+    return sorted(tabla, key=lambda k: tabla[k][1])
+
+def time_relative(funcion, min_time):   # Devuelve (segundos por llamada, relativo): relativo es el tiempo dividido entre el de calibration() medido justo antes y justo después, así no cambia si toda la máquina se pone más lenta o más rápida entre una corrida y otra.
+    antes = time_stage(calibration, 0)
+    segundos = time_stage(funcion, min_time)
+    despues = time_stage(calibration, 0)
+    return segundos, 2 * segundos / (antes + despues)
+
+def fresh_subsets(nfa, representantes):     # Construcción de subconjuntos con un Closure_Engine nuevo, para que cada repetición no reuse las cerraduras de la anterior.
+    nfa.closure_engine = None
+    return grafo.get_cerraduras(nfa, representantes)
+
+def all_closures(nfa, representantes):  # Cerradura de cada estado y move de cada estado con cada símbolo, con un Closure_Engine nuevo.
+    engine = grafo.Closure_Engine(nfa)
+    for i in range(0, len(engine.vertices)):
+        engine.state_closure(i)
+        for simbolo in representantes:
+            engine.move(1 << i, simbolo)
+
+def time_pipeline(regex, min_time):     # (segundos, relativo) de cada etapa de la compilación (ver time_relative) y el Automaton resultante. Cada etapa se mide por separado sobre el resultado de la anterior.
+    tiempos = {}
+    alfabeto = list(ALFABETO)
+
+    def tokenizar():
+        tokens = grafo.tokenize(regex, alfabeto)
+        return grafo.Symbol_Classes([tokens], alfabeto), grafo.insert_concatenation(tokens)
+
+    clases, expresion = tokenizar()
+    tiempos["tokenize"] = time_relative(tokenizar, min_time)
+    arbol = grafo.to_ast(expresion)
+    tiempos["parse"] = time_relative(lambda: grafo.to_ast(expresion), min_time)
+    nfa = grafo.ast_to_nfa(arbol, clases)
+    tiempos["thompson"] = time_relative(lambda: grafo.ast_to_nfa(arbol, clases), min_time)
+
+    representantes = clases.get_representantes()
+    tiempos["closure"] = time_relative(lambda: all_closures(nfa, representantes), min_time)
+    dfa = fresh_subsets(nfa, representantes)
+    tiempos["subset"] = time_relative(lambda: fresh_subsets(nfa, representantes), min_time)
+    tiempos["glushkov"] = time_relative(lambda: grafo.glushkov_dfa(grafo.Glushkov_Positions(arbol, clases), representantes), min_time)    # Construcción directa del DFA (Glushkov) desde el mismo árbol, para compararla con thompson + subset.
+    minimo = grafo.minimize_dfa(dfa, representantes)
+    tiempos["minimize"] = time_relative(lambda: grafo.minimize_dfa(dfa, representantes), min_time)
+    compiled = grafo.compile_dfa(minimo, representantes, clases.get_columnas())
+    tiempos["compile"] = time_relative(lambda: grafo.compile_dfa(minimo, representantes, clases.get_columnas()), min_time)
+    tiempos["print"] = time_relative(lambda: (str(nfa), str(dfa)), min_time)
+
+    return tiempos, grafo.Automaton(regex, alfabeto, nfa, dfa, compiled, minimo)
+
+def match_inputs(regex):    # Entradas fijas para los matches: cadenas cortas aleatorias y un texto largo.
+    aleatorio = random.Random(SEED)
+    simbolos = sorted(set(c for c in regex if c in ALFABETO))
+    cadenas = ["".join(aleatorio.choice(simbolos) for _ in range(aleatorio.randint(1, 24))) for _ in range(20000)]
+    texto = "".join(aleatorio.choice(ALFABETO) for _ in range(20000))
+    return cadenas, texto
+
+def time_matching(automaton, regex, min_time):  # (segundos, relativo) de fullmatch sobre 20000 cadenas cortas y de search de todos los matches de un texto de 20000 caracteres.
+    cadenas, texto = match_inputs(regex)
+    fullmatch = automaton.fullmatch
+
+    def todas():
+        for cadena in cadenas:
+            fullmatch(cadena)
+
+    def buscar():   # Todos los matches del texto, uno después del otro.
+        pos = 0
+        while pos <= len(texto):
+            encontrado = automaton.search(texto, pos)
+            if encontrado is None:
+                break
+            pos = max(encontrado[1], encontrado[0] + 1)
+
+    return {"fullmatch": time_relative(todas, min_time), "search": time_relative(buscar, min_time)}
+
+def run(repeat, filtro=None, min_time=MIN_TIME, nombres=None):    # Corre todo el corpus (o solo los patrones de nombres) y devuelve ({patrón: {etapa: segundos}}, {patrón: {etapa: relativo}}), con la mediana de repeat corridas.
+    resultados = {}
+    relativos = {}
+    for nombre, regex in CORPUS:
+        if (filtro and filtro not in nombre) or (nombres is not None and nombre not in nombres):
+            continue
+        corridas = {}
+        for _ in range(0, repeat):
+            tiempos, automaton = time_pipeline(regex, min_time)
+            tiempos.update(time_matching(automaton, regex, min_time))
+            for etapa, medicion in tiempos.items():
+                corridas.setdefault(etapa, []).append(medicion)
+        resultados[nombre] = {etapa: statistics.median(m[0] for m in mediciones) for etapa, mediciones in corridas.items()}
+        relativos[nombre] = {etapa: statistics.median(m[1] for m in mediciones) for etapa, mediciones in corridas.items()}
+        print(f"{nombre}: " + ", ".join(f"{etapa}={segundos * 1000:.3f}ms" for etapa, segundos in resultados[nombre].items()), file=sys.stderr)
+    return resultados, relativos
+
+
+# ================================ Comparación ================================
+
+
+def compare(salida, baseline, threshold):   # Devuelve la lista de (patrón, etapa, antes, después) en segundos de las etapas que se hicieron más lentas que baseline por más de threshold (0.25 = 25%). Si los dos tienen tiempos relativos a calibration(), la etapa también tiene que ser más lenta en relativo: así no cuenta que toda la máquina esté más lenta que cuando se guardó el baseline.
+    regresiones = []
+    relativos = salida.get("relative", {})
+    relativos_antes = baseline.get("relative", {})
+    for nombre, etapas in salida["results"].items():
+        for etapa, segundos in etapas.items():
+            antes = baseline["results"].get(nombre, {}).get(etapa)
+            if antes is None or max(antes, segundos) < NOISE_FLOOR or segundos <= antes * (1 + threshold):
+                continue
+            ahora, previo = relativos.get(nombre, {}).get(etapa), relativos_antes.get(nombre, {}).get(etapa)
+            if ahora is None or previo is None or ahora > previo * (1 + threshold):
+                regresiones.append((nombre, etapa, antes, segundos))
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the RegEx -> NFA -> DFA pipeline.")
+    parser.add_argument("--repeat", type=int, default=7, help="runs per pattern, the median is kept")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="each stage is looped until it takes at least this many seconds")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--filter", help="only run patterns whose name contains this text")
+    parser.add_argument("--retries", type=int, default=2, help="times the patterns with a regression are measured again before failing")
+    args = parser.parse_args()
+
+    resultados, relativos = run(args.repeat, args.filter, args.min_time)
+    salida = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "repeat": args.repeat, "min_time": args.min_time},
+        "results": resultados,
+        "relative": relativos,
+    }
+    texto = json.dumps(salida, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as archivo:
+            archivo.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.baseline:
+        with open(args.baseline) as archivo:
+            baseline = json.load(archivo)
+        regresiones = compare(salida, baseline, args.threshold)
+        for _ in range(0, args.retries):    # Una regresión tiene que repetirse al volver a medir el patrón; una ráfaga de carga de la máquina no se repite.
+            if not regresiones:
+                break
+            nombres = set(nombre for nombre, etapa, antes, despues in regresiones)
+            print("Measuring again: " + ", ".join(sorted(nombres)), file=sys.stderr)
+            resultados, relativos = run(args.repeat, args.filter, args.min_time, nombres)
+            regresiones = compare({"results": resultados, "relative": relativos}, baseline, args.threshold)
+        for nombre, etapa, antes, despues in regresiones:
+            print(f"REGRESSION {nombre} {etapa}: {antes * 1000:.2f}ms -> {despues * 1000:.2f}ms", file=sys.stderr)
+        if regresiones:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,31 @@
 # Elaborado por Diego Isaac Fuentes Juvera A01705506.
 # El día 15 de marzo del 2024 para la materia de Implementación de métodos computacionales.
 
+import argparse
+import base64
+import cProfile
+import io
+import json
+import mmap
+import os
+import pstats
+import signal
+import struct
+import sys
+import time
+import tracemalloc
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:     # NumPy solo se necesita para fullmatch_batch.
+    np = None
+
 # ================================ Grafo ===============================
 
 #Clase Directed_Graph, grafo, o autómata. Guarda un diccionario que contiene todos los estados y transiciones del autómata.
@@ -9,12 +34,19 @@ class Directed_Graph:
 
     def __init__(self):     # Inicializa la clase con un diccionario vacío que guardará cada nodo del grafo, sus conexiones, y sus transiciones para cada conexión.
         self.graph_dict = {}
+        self.vertex_index = {}  # Índice nombre -> nodo, para no tener que recorrer todos los nodos al buscar uno.
+        self.adjacency = {}     # Para cada nodo, un diccionario caracter de transición -> lista de nodos destino.
+        self.closure_engine = None  # Closure_Engine del grafo, se crea la primera vez que se pide y se descarta si el grafo cambia.
+        self.miembros = None    # Si las transiciones son representantes de clases (Symbol_Classes), los símbolos del alfabeto de cada representante.
 
     def add_vertex(self, vertex):   # Añade un nodo al grafo si este no existe todavía.
         if vertex in self.graph_dict:
             return "Vertex already in graph"
         else:
             self.graph_dict[vertex] = []
+            self.vertex_index[vertex.get_name()] = vertex
+            self.adjacency[vertex] = {}
+            self.closure_engine = None
 
     def add_edge(self, edge):   # Añade una conexión al grafo.
         v1 = edge.get_v1()  # Nodo origen.
@@ -26,51 +58,48 @@ class Directed_Graph:
         if v2 not in self.graph_dict:
             raise ValueError(f"Vertex {v2.get_name()} not in graph")
         
-        self.graph_dict[v1].append([v2, trans])     # Añade la conexión al diccionario del grafo. (Añade el grafo v2 como una conexión del diccionario de conexiones del grafo v1).
+        self.graph_dict[v1].append((v2, trans))     # Añade la conexión al diccionario del grafo. (Añade el grafo v2 como una conexión del diccionario de conexiones del grafo v1).
+        self.closure_engine = None
+        por_caracter = self.adjacency[v1]   # Y también al índice por caracter de transición.
+        character = trans.get_character()
+        if character in por_caracter:
+            por_caracter[character].append(v2)
+        else:
+            por_caracter[character] = [v2]
 
     def is_vertex_in(self, vertex):     # Devuelve verdadero si el nodo existe en el grafo.
         return vertex in self.graph_dict 
 
     def get_vertex(self, vertex_name):  # Devuelve el nodo correspondiente a partir de una string (Ej. Buscar el nodo llamado "1" o "B").
-        for v in self.graph_dict:
-            if vertex_name == v.get_name():
-                return v
+        if vertex_name in self.vertex_index:
+            return self.vertex_index[vertex_name]
         print(f"Vertex {vertex_name} does not exist")   # Si no lo encuentra devuelve este mensaje.
 
     def get_neighbours(self, vertex):   # Devuelve la lista de conexiones de un nodo.
         return self.graph_dict[vertex]
+
+    def get_successors(self, vertex, character):    # Devuelve la lista de nodos a los que se llega desde vertex con la transición character (Ej. todos los sucesores épsilon con "#").
+        return self.adjacency[vertex].get(character, ())
+
+    def set_miembros(self, miembros):
+        self.miembros = miembros
+
+    def get_miembros(self, character):  # Devuelve los símbolos del alfabeto que representa el caracter de una transición: todos los de su clase, o solo él mismo.
+        if self.miembros is None or character not in self.miembros:
+            return (character,)
+        return self.miembros[character]
+
+    def get_closure_engine(self):   # Devuelve el Closure_Engine del grafo, creándolo si todavía no existe.
+        if self.closure_engine is None:
+            self.closure_engine = Closure_Engine(self)
+        return self.closure_engine
     
-    def __str__(self):  # Función que se ejecuta al mandar a imprimir un objeto de la clase Directed_Graph: print(Graph).
-        all_edges = ""  # Va añadiendo todos los nodos del grafo junto a sus conexiones a una string "all_edges" y la devuelve.
-        accepting_states = []
-        for v1 in self.graph_dict:     
-            all_edges += v1.get_name() + " => ["
-            first = True
-            for v2 in self.graph_dict[v1]:
-                if first:
-                    first = False
-                    all_edges += "(" + v2[0].get_name() + ", '" + v2[1].get_character() + "')"
-                else:
-                    all_edges += ", (" + v2[0].get_name() + ", '" + v2[1].get_character() + "')"
-            all_edges += "]"
-            if v1.get_end():
-                accepting_states.append(v1.get_name())
-            if v1.get_begin():
-                all_edges += " Start"
-            
-
-            all_edges += "\n"
-        all_edges += "Accepting states: ["
-        first = True
-        for state in accepting_states:
-            if first:
-                all_edges += "'" + state + "'"
-            else:
-                all_edges += ",'" + state + "'"
-        all_edges += "]"
-        return all_edges
+    def __str__(self):  # Función que se ejecuta al mandar a imprimir un objeto de la clase Directed_Graph: print(Graph). Para autómatas grandes conviene export_graph, que escribe por partes sin armar toda la string.
+        return "".join(iter_text(self))
     
     def merge_graph(self, graph):   # Función para combinar 2 grafos. Copia los nodos y conexiones del segundo grafo en el primero.
+        if self.miembros is None:
+            self.miembros = graph.miembros
         for v in graph.graph_dict:  # Primero añade todos los nodos al diccionario.
             self.add_vertex(v)        
         for v in graph.graph_dict:  # Luego añade todas las conexiones a los nodos añadidos.
@@ -79,7 +108,8 @@ class Directed_Graph:
 
 # Clase Edge, arista, o transición.
 class Edge:
-    
+    __slots__ = ("v1", "v2", "trans")   # Con __slots__ los objetos no llevan un diccionario propio y ocupan mucho menos memoria.
+
     def __init__(self, v1, v2, trans):  # Una conexión está compuesta de 1 nodo origen, 1 nodo destino, y una transición.
         self.v1 = v1
         self.v2 = v2
@@ -99,6 +129,8 @@ class Edge:
     
 # Clase Vertex, vertice, nodo, o estado.
 class Vertex:
+    __slots__ = ("name", "begin", "end")
+
     def __init__(self, name):   # Un nodo tiene nombre y puede tener 3 estados posibles: Ser el inicio del grafo, ser el final del grafo, o no ser ninguno de los 2.
         self.name = name
         self.begin = False
@@ -124,8 +156,19 @@ class Vertex:
     
 # Clase Transition, transición, o costo.
 class Transition:   # El objeto transición solo guarda el caracter de transición para objetos de la clase Edge.
-    def __init__(self, character):
-        self.character = character
+    __slots__ = ("character",)
+    interned = {}   # Como una transición solo guarda su caracter, todas las transiciones con el mismo caracter comparten un único objeto.
+
+    def __new__(cls, character):
+        trans = cls.interned.get(character)
+        if trans is None:
+            trans = object.__new__(cls)
+            trans.character = character
+            cls.interned[character] = trans
+        return trans
+
+    def __getnewargs__(self):   # Para que pickle también pase por __new__ y el objeto quede internado al cargarlo.
+        return (self.character,)
 
     def get_character(self):
         return self.character
@@ -137,144 +180,121 @@ class Transition:   # El objeto transición solo guarda el caracter de transici
 # ================================ Construcción de autómatas ===============================
      
 
-# Función para construir un automata a partir de una sola transición: a
-def build_simple_automata(trans):
-    g = Directed_Graph()
-    global node_counter     # Contador global para saber cuantos nodos se han creado hasta el momento.
+# Clase Node_Counter, contador de cuantos nodos llevamos. Cada construcción de un NFA usa su propio contador, así no se comparte estado entre compilaciones.
+class Node_Counter:
 
-    temp_c1 = str(node_counter)     # Pasamos el número del contador a string para poder nombrar nodos con él.
-    g.add_vertex(Vertex(temp_c1))   # Añadimos un nodo llamado temp_c1 (contador 1 temporal) al grafo g.
-    g.get_vertex(temp_c1).set_begin(True)   # Definimos que este nuevo nodo será el inicio del grafo.
-    node_counter += 1    # Añadimos uno al contador global de nodos.
+    def __init__(self):
+        self.count = 0
 
-    temp_c2 = str(node_counter)     # Hacemos lo mismo para este otro nodo.
-    g.add_vertex(Vertex(temp_c2))
-    g.get_vertex(temp_c2).set_end(True)     # Lo definimos como el final del grafo.
-    node_counter += 1
+    def new_name(self):     # Devuelve el nombre del siguiente nodo y avanza el contador.
+        name = str(self.count)
+        self.count += 1
+        return name
 
-    g.add_edge(Edge(g.get_vertex(temp_c1), g.get_vertex(temp_c2),Transition(trans)))    # Añadimos una conexión al grafo compuesta de los nodos inicial y final definidos previamente y de la transición que especifiquemos para el autómata.
-    return g    # Regresamos el grafo de este autómata.
+    def get_count(self):
+        return self.count
 
-# Construir un automata a partir de automatas encadenados: ab.
-def build_sequence_automata(g1, g2):
-
-    g1.merge_graph(g2)  # Combinamos los 2 grafos.
-    for v1 in g2.graph_dict:
-            if v1.get_begin() == True:  # Revisamos el segundo grafo para encontrar su nodo de inicio.
-                for v2 in g1.graph_dict:
-                    if v2.get_end() == True:    # Revisamos el primer grafo para encontrar su nodo de fin
-                        g1.add_edge(Edge(v2, v1, Transition("#")))  # Conectamos el nodo de fin del primer grafo con el nodo de incio del segundo.
-                        v2.set_end(False)   # Establecemos que los nodos de inicio y fin que acabamos de conectar ya no lo son, pues han sido conectados.
-                        v1.set_begin(False)
-                        break   # Rompemos el ciclo para que no busque mas nodos de inicio y de fin.
-                break
-    
+# Clase Fragment, pedazo de NFA en construcción. Todos los fragmentos de una expresión viven en el mismo grafo y cada uno solo guarda su nodo de inicio y su nodo de fin (Thompson siempre tiene uno de cada), así los builders los combinan sin buscar ni copiar nodos.
+class Fragment:
+    __slots__ = ("begin", "end")
 
-    return g1   # Devolvemos el primer grafo, en el que sucedieron los cambios.
+    def __init__(self, begin, end):
+        self.begin = begin
+        self.end = end
 
-# Función para construir un automata a partir de automadas agrupados por un or: s|p.
-def build_or_automata(g1, g2):
-    g1.merge_graph(g2)  # Combinamos los 2 grafos que son parte de la expresión or.
-    global node_counter     # Llamamos a la variable global de contador de nodos.
-
-    temp_c1 = str(node_counter)     # Creamos un nodo nuevo en base al contador.
-    g1.add_vertex(Vertex(temp_c1))
-    node_counter += 1
-
-    for v in g1.graph_dict: 
-        if v.get_begin() == True:   # Encontramos todos los nodos con la propiedad begin.
-            g1.add_edge(Edge(g1.get_vertex(temp_c1), v, Transition("#")))   # Conectamos esos nodos al nuevo nodo que acababamos de crear.
-            v.set_begin(False)  # Le quitamos la propiedad begin a los nodos que acabamos de conectar.
-    
-    g1.get_vertex(temp_c1).set_begin(True)  # Establecemos el nuevo nodo, ya conectado, como el inicio del grafo.
+    def get_begin(self):
+        return self.begin
 
-    temp_c2 = str(node_counter)     # Repetimos lo mismo pero ahora con el final del grafo, creamos un nuevo nodo.
-    g1.add_vertex(Vertex(temp_c2))
-    node_counter += 1
+    def get_end(self):
+        return self.end
 
-    for v in g1.graph_dict:
-        if v.get_end() == True:     # Encontramos los nodos con la propiedad end.
-            g1.add_edge(Edge(v, g1.get_vertex(temp_c2), Transition("#")))   # Conectamos esos nodos al nuevo nodo.
-            v.set_end(False)    # Les quitamos la propiedad end.
-    
-    g1.get_vertex(temp_c2).set_end(True)    # Establecemos el nuevo nodo como el final del grafo.
+def new_vertex(g, counter):     # Añade al grafo g un nodo nuevo con el siguiente nombre del contador y lo devuelve.
+    v = Vertex(counter.new_name())
+    g.add_vertex(v)
+    return v
 
-    return g1   # Devolvemos el primer grafo, en el que sucedieron los cambios.
+# Función para construir un automata a partir de una sola transición: a
+def build_simple_automata(g, trans, counter):
+    inicio = new_vertex(g, counter)     # Nodo de inicio del fragmento.
+    fin = new_vertex(g, counter)        # Nodo de fin del fragmento.
+    g.add_edge(Edge(inicio, fin, Transition(trans)))    # Los conectamos con la transición que especifiquemos para el autómata.
+    return Fragment(inicio, fin)
+
+# Función para construir un automata a partir de una clase de caracteres: [abc]. Es igual que build_simple_automata pero con una transición por cada símbolo de la clase.
+def build_class_automata(g, simbolos, counter):
+    inicio = new_vertex(g, counter)
+    fin = new_vertex(g, counter)
+    for simbolo in simbolos:
+        g.add_edge(Edge(inicio, fin, Transition(simbolo)))
+    return Fragment(inicio, fin)
 
-# Función para consturir un automata a partir de otro autómata que se pueda repetir 1 o más veces: s+.
-def build_oneOrmore_automata(g):
-    global node_counter
-
-    temp_c1 = str(node_counter)     # Creamos un nuevo nodo.
-    g.add_vertex(Vertex(temp_c1))
-    node_counter += 1
-
-    temp_c2 = str(node_counter)     # Creamos otro nuevo nodo.
-    g.add_vertex(Vertex(temp_c2))
-    node_counter += 1
-
-    for v1 in g.graph_dict: 
-        if v1.get_end() == True:
-            for v2 in g.graph_dict:
-                if v2.get_begin() == True:
-                    g.add_edge(Edge(v1, v2, Transition("#")))   # Conectamos el último nodo del autómata al primero para que pueda haber iteraciones.
-            
-    for v in g.graph_dict:
-        if v.get_begin() == True:
-            g.add_edge(Edge(g.get_vertex(temp_c1), v, Transition("#")))     # Conectamos el primer nodo que creamos al inicio del automata.
-            v.set_begin(False)  # Quitamos la propiedad begin al nodo del autómata que acabamos de conectar.
+# Construir un automata a partir de automatas encadenados: ab.
+def build_sequence_automata(g, f1, f2):
+    g.add_edge(Edge(f1.get_end(), f2.get_begin(), Transition("#")))     # Conectamos el nodo de fin del primer fragmento con el nodo de inicio del segundo.
+    return Fragment(f1.get_begin(), f2.get_end())
 
-    g.get_vertex(temp_c1).set_begin(True)   # Definimos que el primer nodo que creamso yq ue acabamos de conectar es el nuevo incio del autómata.
-    
-    for v in g.graph_dict:
-        if v.get_end() == True:
-            g.add_edge(Edge(v, g.get_vertex(temp_c2), Transition("#")))     # Hacemos lo mismo pero para el segundo nodo que creamos, convirtiendolo en el final del autómata.
-            v.set_end(False)
+# Función para construir un automata a partir de automadas agrupados por un or: s|p.
+def build_or_automata(g, f1, f2, counter):
+    inicio = new_vertex(g, counter)     # Nuevo nodo de inicio, conectado a los inicios de los 2 fragmentos.
+    g.add_edge(Edge(inicio, f1.get_begin(), Transition("#")))
+    g.add_edge(Edge(inicio, f2.get_begin(), Transition("#")))
 
-    g.get_vertex(temp_c2).set_end(True)
+    fin = new_vertex(g, counter)    # Y nuevo nodo de fin, al que llegan los fines de los 2 fragmentos.
+    g.add_edge(Edge(f1.get_end(), fin, Transition("#")))
+    g.add_edge(Edge(f2.get_end(), fin, Transition("#")))
 
-    return g    # Devolvemos el automata modificado.
-    
+    return Fragment(inicio, fin)
 
-# Función para construir un autómata a partir de otro automata que se pueda repetir 0 o más veces: s*.
-def build_recursion_automata(g):    # Esta función es similar a la del or, pero solo requiere un grafo y además primero cree todos los nuevos nodos y luego los conecte.
-    global node_counter
-
-    temp_c1 = str(node_counter)     # Creamos un nuevo nodo.
-    g.add_vertex(Vertex(temp_c1))
-    node_counter += 1
-
-    temp_c2 = str(node_counter)     # Creamos otro nuevo nodo.
-    g.add_vertex(Vertex(temp_c2))
-    node_counter += 1
-
-    g.add_edge(Edge(g.get_vertex(temp_c1), g.get_vertex(temp_c2), Transition("#")))     # Conectamos el primer nodo con el último.
-
-    for v1 in g.graph_dict: 
-        if v1.get_end() == True:
-            for v2 in g.graph_dict:
-                if v2.get_begin() == True:
-                    g.add_edge(Edge(v1, v2, Transition("#")))   # Conectamos el último nodo del autómata al primero para que pueda haber iteraciones.
-            
-    for v in g.graph_dict:
-        if v.get_begin() == True:
-            g.add_edge(Edge(g.get_vertex(temp_c1), v, Transition("#")))     # Conectamos el primer nodo que creamos al inicio del automata.
-            v.set_begin(False)  # Quitamos la propiedad begin al nodo del autómata que acabamos de conectar.
+# Función para consturir un automata a partir de otro autómata que se pueda repetir 1 o más veces: s+.
+def build_oneOrmore_automata(g, f, counter):
+    inicio = new_vertex(g, counter)
+    fin = new_vertex(g, counter)
 
-    g.get_vertex(temp_c1).set_begin(True)   # Definimos que el primer nodo que creamso yq ue acabamos de conectar es el nuevo incio del autómata.
-    
-    for v in g.graph_dict:
-        if v.get_end() == True:
-            g.add_edge(Edge(v, g.get_vertex(temp_c2), Transition("#")))     # Hacemos lo mismo pero para el segundo nodo que creamos, convirtiendolo en el final del autómata.
-            v.set_end(False)
+    g.add_edge(Edge(f.get_end(), f.get_begin(), Transition("#")))   # Conectamos el último nodo del fragmento al primero para que pueda haber iteraciones.
+    g.add_edge(Edge(inicio, f.get_begin(), Transition("#")))    # El nuevo inicio entra al fragmento
+    g.add_edge(Edge(f.get_end(), fin, Transition("#")))         # y el fin del fragmento sale al nuevo fin.
+
+    return Fragment(inicio, fin)
 
-    g.get_vertex(temp_c2).set_end(True)
+# Función para construir un autómata a partir de otro automata que se pueda repetir 0 o más veces: s*.
+def build_recursion_automata(g, f, counter):    # Igual que build_oneOrmore_automata, más una transición directa del nuevo inicio al nuevo fin para aceptar 0 repeticiones.
+    inicio = new_vertex(g, counter)
+    fin = new_vertex(g, counter)
 
-    return g    # Devolvemos el automata modificado.
+    g.add_edge(Edge(inicio, fin, Transition("#")))  # Conectamos el primer nodo con el último.
+    g.add_edge(Edge(f.get_end(), f.get_begin(), Transition("#")))
+    g.add_edge(Edge(inicio, f.get_begin(), Transition("#")))
+    g.add_edge(Edge(f.get_end(), fin, Transition("#")))
 
-node_counter = 0    # Variable global de contador de cuantos nodos llevamos.
-    
-def get_prio(ch):   # Devuelve la prioridad de los operadores, siendo 1 la mas baja.
+    return Fragment(inicio, fin)
+
+# Función para unir varios autómatas en uno solo: p1|p2|...|pn. Funciona como el inicio de build_or_automata, pero no junta los finales para que se pueda saber cuál de los autómatas aceptó.
+def build_union_automata(automatas, counter):
+    g = Directed_Graph()
+    if automatas:   # Todos los autómatas de la unión usan las mismas clases de símbolos.
+        g.set_miembros(automatas[0].miembros)
+    inicio = Vertex(counter.new_name())     # Nuevo nodo de inicio.
+    inicio.set_begin(True)
+    g.add_vertex(inicio)
+
+    finales = []    # Para cada autómata, la lista de sus nodos finales dentro del grafo nuevo.
+    for automata in automatas:
+        copias = {}     # Copiamos cada nodo con un nombre nuevo, porque cada autómata pudo haber sido construido con su propio contador.
+        for v in automata.graph_dict:
+            copia = Vertex(counter.new_name())
+            copia.set_end(v.get_end())
+            g.add_vertex(copia)
+            copias[v] = copia
+        for v in automata.graph_dict:
+            for v2 in automata.graph_dict[v]:
+                g.add_edge(Edge(copias[v], copias[v2[0]], v2[1]))
+            if v.get_begin() == True:
+                g.add_edge(Edge(inicio, copias[v], Transition("#")))    # Conectamos el nuevo inicio con el inicio del autómata.
+        finales.append([copias[v] for v in automata.graph_dict if v.get_end()])
+
+    return g, finales
+
+def get_prio(ch):   # Devuelve la prioridad de los operadores: un número menor se aplica primero.
     if ch == "+":
         return 2
     elif ch == "*":
@@ -286,239 +306,2394 @@ def get_prio(ch):   # Devuelve la prioridad de los operadores, siendo 1 la mas b
     elif ch == "(":
         return 5
 
-def do_operation(operator):     # Ejecuta transformaciones de los automatas dependiendo del operador con el que se llame. Administra los utomatas del stack para que se operen en orden correcto.
-    global stack_operandos
+def do_operation(operator, stack_operandos, g, counter):   # Ejecuta transformaciones de los fragmentos dependiendo del operador con el que se llame. Administra los fragmentos del stack para que se operen en orden correcto.
 
     if operator == "|":
         a1 = stack_operandos.pop()
         a2 = stack_operandos.pop()
-        stack_operandos.append(build_or_automata(a2, a1))
+        stack_operandos.append(build_or_automata(g, a2, a1, counter))
         return "| exitoso"
     
     elif operator == "*":
         a1 = stack_operandos.pop()
-        stack_operandos.append(build_recursion_automata(a1))
+        stack_operandos.append(build_recursion_automata(g, a1, counter))
         return "* exitoso"
     
     elif operator == "+":
         a1 = stack_operandos.pop()
-        stack_operandos.append(build_oneOrmore_automata(a1))
+        stack_operandos.append(build_oneOrmore_automata(g, a1, counter))
         return "+ exitoso"
 
     elif operator == "·":
         a1 = stack_operandos.pop()
         a2 = stack_operandos.pop()
-        stack_operandos.append(build_sequence_automata(a2, a1))
+        stack_operandos.append(build_sequence_automata(g, a2, a1))
         return "· exitoso"
 
 
 # ================================ Regex to NFA ================================
 
 
-alfabetostr = input("Alphabet: ")   # Inputs del alfabeto y de la expresión.
-expres = input("RegEx: ")
-
-print("\n----RESULTS----\nINPUT:")
-print(expres)
-
-alfabeto = []
-expresion = []
-
 operadores = ["+","*","·","|","(",]     # Lista de operadores.
-for letra in alfabetostr:
-    alfabeto.append(letra)  # Convierte el string del alfabeto en un arreglo.
 
-for letrar in expres:
-    expresion.append(letrar)
+def parse_class(contenido, alfabeto):   # Devuelve el frozenset de símbolos del alfabeto que acepta una clase de caracteres, sin los corchetes: "abc", "a-z0-9", "^ab" (todos menos a y b).
+    negada = contenido.startswith("^")
+    if negada:
+        contenido = contenido[1:]
+    simbolos = set()
+    i = 0
+    while i < len(contenido):
+        if i + 2 < len(contenido) and contenido[i + 1] == "-":  # Rango por código de caracter, Ej. a-z. Acepta los símbolos del alfabeto que caen en el rango.
+            inicio = ord(contenido[i])
+            fin = ord(contenido[i + 2])
+            if inicio > fin:
+                raise ValueError(f"Invalid range {contenido[i]}-{contenido[i + 2]}")
+            rango = [s for s in alfabeto if inicio <= ord(s) <= fin]
+            if not rango:
+                raise ValueError(f"Range {contenido[i]}-{contenido[i + 2]} has no symbols in the alphabet")
+            simbolos.update(rango)
+            i += 3
+        else:
+            if contenido[i] not in alfabeto:    # Igual que un símbolo fuera de una clase.
+                raise ValueError(f"Symbol {contenido[i]} is not in the alphabet")
+            simbolos.add(contenido[i])
+            i += 1
+    if negada:
+        return frozenset(s for s in alfabeto if s not in simbolos)
+    return frozenset(simbolos)
+
+def tokenize(expres, alfabeto):     # Separa la expresión en tokens. Cada operando es un frozenset con los símbolos que acepta (una letra, o una clase [...]); operadores, paréntesis y cualquier otro caracter quedan como strings.
+    simbolos = set(alfabeto)
+    tokens = []
+    i = 0
+    while i < len(expres):
+        if expres[i] in simbolos:
+            tokens.append(frozenset([expres[i]]))
+        elif expres[i] == "[":  # "[" solo abre una clase si no es parte del alfabeto.
+            fin = expres.find("]", i + 1)
+            if fin < 0:
+                raise ValueError(f"Unterminated character class at position {i}")
+            tokens.append(parse_class(expres[i + 1:fin], simbolos))
+            i = fin
+        else:
+            tokens.append(expres[i])
+        i += 1
+    return tokens
+
+def class_members(representantes, columnas):    # Diccionario representante -> lista de los símbolos de su clase, en el orden del alfabeto.
+    miembros = {}
+    for simbolo, col in columnas.items():
+        miembros.setdefault(representantes[col], []).append(simbolo)
+    return miembros
+
+# Clase Symbol_Classes, partición del alfabeto en clases de símbolos que las expresiones nunca distinguen (Ej. con [a-z] todas las letras van juntas). El autómata usa un símbolo representante por clase en lugar de todo el alfabeto.
+class Symbol_Classes:
+
+    def __init__(self, token_lists, alfabeto):  # token_lists son los tokens de una o varias expresiones que van a compartir autómata.
+        conjuntos = {}
+        for tokens in token_lists:
+            for token in tokens:
+                if isinstance(token, frozenset) and token not in conjuntos:
+                    conjuntos[token] = len(conjuntos)
+
+        firmas = {}     # Para cada símbolo, los conjuntos en los que aparece. Dos símbolos son equivalentes si aparecen en exactamente los mismos.
+        for s in alfabeto:
+            firmas[s] = []
+        for conjunto, k in conjuntos.items():
+            for s in conjunto:
+                firmas[s].append(k)
+
+        por_firma = {}
+        self.representantes = []    # Símbolo que representa a cada clase, en el orden del alfabeto.
+        self.columnas = {}          # Clase (columna de la tabla) de cada símbolo del alfabeto.
+        for s in alfabeto:
+            firma = tuple(firmas[s])
+            if firma not in por_firma:
+                por_firma[firma] = len(self.representantes)
+                self.representantes.append(s)
+            self.columnas[s] = por_firma[firma]
+        self.miembros = class_members(self.representantes, self.columnas)
+
+    def get_representantes(self):
+        return self.representantes
+
+    def get_miembros(self):
+        return self.miembros
+
+    def get_columnas(self):
+        return self.columnas
+
+    def representar(self, conjunto):    # Representantes de las clases de un conjunto de símbolos.
+        clases = sorted(set(self.columnas[s] for s in conjunto))
+        return [self.representantes[c] for c in clases]
+
+def insert_concatenation(expresion):    # Devuelve la lista de tokens con el operador · de concatenación donde haga falta (Ej. ab -> a·b), en una sola pasada.
+    resultado = []
+    anterior = None
+    for token in expresion:     # Va un · entre un operando, ")" , "*" o "+" y el operando o "(" que le sigue.
+        if (isinstance(token, frozenset) or token == "(") and (isinstance(anterior, frozenset) or anterior == ")" or anterior == "*" or anterior == "+"):
+            resultado.append("·")
+        resultado.append(token)
+        anterior = token
+    return resultado
+
+# Clase Regex_Node, nodo del árbol de sintaxis de una expresión: un operador y sus operandos, que son otros nodos o frozensets de símbolos (las hojas).
+class Regex_Node:
+    __slots__ = ("operator", "children")
+
+    def __init__(self, operator, children):
+        self.operator = operator
+        self.children = children
+
+    def get_operator(self):
+        return self.operator
+
+    def get_children(self):
+        return self.children
+
+def apply_operator(operator, stack_nodos):  # Saca del stack los operandos de operator y mete el nodo que los combina.
+    aridad = 1 if operator == "*" or operator == "+" else 2
+    if len(stack_nodos) < aridad:
+        raise ValueError(f"Missing operand for {operator}")
+    hijos = stack_nodos[-aridad:]
+    del stack_nodos[-aridad:]
+    stack_nodos.append(Regex_Node(operator, hijos))
+
+def to_ast(expresion):  # Construye el árbol de sintaxis de una lista de tokens que ya tiene los ·, con el algoritmo shunting-yard. * y + se aplican en cuanto aparecen porque son los de más prioridad; · y | sacan del stack todos los operadores de igual o más prioridad antes de entrar, así asocian a la izquierda.
+    stack_nodos = []
+    stack_operadores = []
+
+    for token in expresion:
+        if isinstance(token, frozenset):    # Los operandos (una letra del alfabeto o una clase) son hojas del árbol.
+            stack_nodos.append(token)
+
+        elif token == "(":
+            stack_operadores.append(token)
+
+        elif token == ")":
+            while stack_operadores and stack_operadores[-1] != "(":
+                apply_operator(stack_operadores.pop(), stack_nodos)
+            if not stack_operadores:
+                raise ValueError("Unbalanced parenthesis")
+            stack_operadores.pop()
+
+        elif token == "*" or token == "+":
+            apply_operator(token, stack_nodos)
 
-posiciones = []
-for i in range(0,len(expresion)):   # Ciclo para obtener las posiciones en las que dentro de la expresión debería ir un operador · de concatenación.
+        elif token == "·" or token == "|":
+            while stack_operadores and get_prio(stack_operadores[-1]) <= get_prio(token):
+                apply_operator(stack_operadores.pop(), stack_nodos)
+            stack_operadores.append(token)
 
-    if i != 0 and (expresion[i] in alfabeto or expresion[i] == "(") and (expresion[i-1] in alfabeto or expresion[i-1] == ")" or expresion[i-1] == "*" or expresion[i-1] == "+"):
-        posiciones.append(i)
+        else:
+            raise ValueError(f"Symbol {token} is not in the alphabet")
 
-for i in range(0, len(posiciones)):     # Ciclo para insertar el operador · dentro de las posiciones obtenidas, teniendo en cuenta el desfase ocurrido por las inserciones.
-    expresion.insert((posiciones[i]+i), "·") 
+    while stack_operadores:     # Al terminar aplicamos los operadores que quedaron en el stack.
+        operator = stack_operadores.pop()
+        if operator == "(":
+            raise ValueError("Unbalanced parenthesis")
+        apply_operator(operator, stack_nodos)
 
+    if len(stack_nodos) != 1:
+        raise ValueError("Empty regex")
+    return stack_nodos[0]
 
-stack_operandos = []    # Stack donde se guardan los operandos o autómatas.
-stack_operadores = []   # Stack donde se guardan los operadores.
+def ast_to_nfa(arbol, clases, counter=None):    # Construye el NFA del árbol con la construcción de Thompson: todos los fragmentos se crean en un solo grafo, recorriendo el árbol en postorden con un stack (sin recursión, así no importa qué tan profundo sea). Si se da counter, los nodos se nombran con él.
+    if counter is None:
+        counter = Node_Counter()    # Contador de nodos de este NFA.
+    g = Directed_Graph()
+    g.set_miembros(clases.get_miembros())
+    stack_operandos = []    # Stack de fragmentos ya construidos.
+    pendientes = [(arbol, False)]   # Nodos por visitar; True si sus hijos ya se construyeron.
+
+    while pendientes:
+        nodo, listo = pendientes.pop()
+        if isinstance(nodo, frozenset):
+            simbolos = clases.representar(nodo)
+            if len(simbolos) == 1:
+                stack_operandos.append(build_simple_automata(g, simbolos[0], counter))
+            else:
+                stack_operandos.append(build_class_automata(g, simbolos, counter))
+        elif listo:
+            do_operation(nodo.get_operator(), stack_operandos, g, counter)  # Hacemos la operación correspondiente con los fragmentos de sus hijos, que están hasta arriba del stack.
+        else:
+            pendientes.append((nodo, True))
+            for hijo in reversed(nodo.get_children()):  # Los hijos se construyen de izquierda a derecha.
+                pendientes.append((hijo, False))
 
-for i in range(0,len(expresion)):   # Repite el ciclo hasta terminar de analizar toda la expresión.
+    fragmento = stack_operandos.pop()
+    fragmento.get_begin().set_begin(True)
+    fragmento.get_end().set_end(True)
+    return g
 
-    if expresion[i] in alfabeto:    # Si el caracter que estamos analizando se encuentra dentro del alfabeto.
-        stack_operandos.append(build_simple_automata(expresion[i]))     # Agrega el automata de la letra que analizamos al stack de operandos.
+def regex_to_nfa(expres, alfabeto, clases=None):    # Convierte una expresión regular en un NFA cuyas transiciones son los representantes de clases (Symbol_Classes, se calculan de la expresión si no se dan). Todo el estado de la construcción (contador y stacks) es local a cada llamada.
+    expresion = tokenize(expres, alfabeto)
+    if clases is None:
+        clases = Symbol_Classes([expresion], alfabeto)
+    return ast_to_nfa(to_ast(insert_concatenation(expresion)), clases)
 
-    elif expresion[i] == "(":
-            stack_operadores.append(expresion[i])
-                  
-    elif expresion[i] in operadores:    # Si el caracter que estamos analizando es un operador.
 
-        
-        if not stack_operadores:    # Si el stack de operadores esta vacío, añadimos el operador al stack.
-            stack_operadores.append(expresion[i])
+# ================================ Prefiltro de literales ================================
 
-        elif get_prio(expresion[i]) < get_prio(stack_operadores[-1]):       # Si el operador que estamos analizando tiene más prioridad que el operador que está hasta arriba del stack de operadores.
-            stack_operadores.append(expresion[i])                           # solo lo añadimos al stack.
 
-        elif get_prio(expresion[i]) >= get_prio(stack_operadores[-1]):      # Si el operador que analizamos tiene menos prioridad,   
-            op = stack_operadores.pop()                                     # sacamos el operador de hasta arriba del stack,
-            do_operation(op)                                                # hacemos su operación correspondiente,
-            stack_operadores.append(expresion[i])                           # e introducimos el operador que analizamos arriba del stack. 
+MAX_LITERAL = 256   # Largo máximo de los literales que se guardan. Un pedazo de un literal obligatorio también es obligatorio, así cortarlos no rompe nada y el análisis queda lineal.
 
-    elif expresion[i] == ")":   # Si el caracter es un ")"
-        while stack_operadores[-1] != "(":  # Mientras el ultimo elemento del stack de operadores no sea un "("
-            op = stack_operadores.pop()     # Sacamos el ultimo operador del stack y hacemos la operación correspondiente.
-            do_operation(op)   
+def common_prefix(a, b):
+    i = 0
+    while i < len(a) and i < len(b) and a[i] == b[i]:
+        i += 1
+    return a[:i]
 
-        if stack_operadores[-1] == "(":     # Si el ultimo elemento si es un "(" entonces lo eliminamos.
-            stack_operadores.pop()
+def common_suffix(a, b):
+    i = 0
+    while i < len(a) and i < len(b) and a[len(a) - 1 - i] == b[len(b) - 1 - i]:
+        i += 1
+    return a[len(a) - i:]
 
-while stack_operadores:             # Al finalizar de analizar la expresión, si el stack de operadores no esta vacío
-    op = stack_operadores.pop()     # Sacamos los operadores uno por uno
-    do_operation(op)                # Y ejecutamos sus operaciones correspondientes.
+def required_literals(arbol):   # Devuelve (prefijo, requerido): un literal con el que empieza todo match de la expresión y uno que aparece dentro de todo match (Ej. ab(c|d)*e -> ("ab", "ab")). Cualquiera puede ser "" si no hay.
+    valores = []    # Stack de (nullable, exacto, prefijo, sufijo, requerido) de los nodos ya calculados. exacto es la única cadena que acepta el nodo, o None.
+    pendientes = [(arbol, False)]
 
-NFA = stack_operandos[-1]   # Guarda el automata que está hasta arriba del stack en la variable NFA.
-print("\nNFA:")
-print(NFA)
+    while pendientes:   # Recorrido en postorden con stack, igual que ast_to_nfa.
+        nodo, listo = pendientes.pop()
+        if isinstance(nodo, frozenset):
+            if len(nodo) == 1:  # Una sola letra es un literal; una clase no.
+                c = next(iter(nodo))
+                valores.append((False, c, c, c, c))
+            else:
+                valores.append((False, None, "", "", ""))
+        elif not listo:
+            pendientes.append((nodo, True))
+            for hijo in reversed(nodo.get_children()):
+                pendientes.append((hijo, False))
+        elif nodo.get_operator() == "·":
+            n2, e2, p2, s2, r2 = valores.pop()
+            n1, e1, p1, s1, r1 = valores.pop()
+            exacto = e1 + e2 if e1 is not None and e2 is not None and len(e1) + len(e2) <= MAX_LITERAL else None
+            prefijo = (e1 + p2 if e1 is not None else p1)[:MAX_LITERAL]
+            sufijo = (s1 + e2 if e2 is not None else s2)[-MAX_LITERAL:]
+            requerido = max((r1, r2, (s1 + p2)[:MAX_LITERAL], prefijo, sufijo), key=len)   # El final del primero seguido del inicio del segundo también es obligatorio.
+            valores.append((n1 and n2, exacto, prefijo, sufijo, requerido))
+        elif nodo.get_operator() == "|":
+            n2, e2, p2, s2, r2 = valores.pop()
+            n1, e1, p1, s1, r1 = valores.pop()
+            prefijo = common_prefix(p1, p2)
+            sufijo = common_suffix(s1, s2)
+            valores.append((n1 or n2, e1 if e1 == e2 else None, prefijo, sufijo, max(prefijo, sufijo, key=len)))
+        elif nodo.get_operator() == "+":
+            n, e, p, s, r = valores.pop()
+            valores.append((n, None, p, s, r))
+        else:   # *: puede no aparecer, no obliga nada.
+            valores.pop()
+            valores.append((True, None, "", "", ""))
+
+    nullable, exacto, prefijo, sufijo, requerido = valores.pop()
+    return prefijo, requerido
+
+def candidate_starts(cadena, pos, prefix, required):    # Generador de las posiciones, desde pos y en orden, en las que puede empezar un match según sus literales: donde aparece prefix, o antes de la siguiente aparición de required. Los literales se buscan con find, que es mucho más rápido que correr el autómata.
+    if prefix:
+        inicio = cadena.find(prefix, pos)
+        while inicio >= 0:
+            yield inicio
+            inicio = cadena.find(prefix, inicio + 1)
+        return
+    siguiente = pos - 1
+    for inicio in range(pos, len(cadena) + 1):
+        if required and siguiente < inicio:     # Un match que empieza en inicio tiene que contener a required desde inicio en adelante.
+            siguiente = cadena.find(required, inicio)
+            if siguiente < 0:
+                return
+        yield inicio
 
 
 # ================================ NFA to DFA ================================ 
 
 
-def cerradura(automata, v, trans):  # Función que devuelve el move (lista de estados) a partir de un estado y de una transición.
-    closure = []    #Establecemos la lista donde se va guardar el resultado
-    neigh = automata.get_neighbours(v)  # Obtenemos la lista de conexiones de nuestro estado.
-    for i in range(0, len(neigh)):  # Recorremos cada conexión del estado
-        if str(neigh[i][1]) == trans:   # Si encontramos una conexión cuya transición coincida con la transición que definimos para el move
-            vert = automata.get_vertex(str(neigh[i][0]))    # Recuperamos el estado
-            if vert not in closure:     # Si el estado no ha sido registrado previamente en el resultado
-                closure.append(vert)    # Añadimos el estado al resultado
-            closure.extend(cerradura(automata, vert, trans))    # Volvemos a llamar la función pero ahora para 
-    closure.sort(key = lambda x: x.name)
-    return closure
+EPSILON = "#"   # Caracter que usamos para las transiciones épsilon.
+
+# Clase Closure_Engine, calcula cerraduras y moves de un NFA. Representa los conjuntos de estados como enteros (bitsets): el bit i encendido significa que el estado i está en el conjunto.
+class Closure_Engine:
+
+    def __init__(self, automata):
+        self.vertices = list(automata.graph_dict)   # Estado que corresponde a cada bit.
+        self.numeros = {}   # Bit que corresponde a cada estado.
+        for i in range(0, len(self.vertices)):
+            self.numeros[self.vertices[i]] = i
+
+        self.sucesores = {}     # Para cada caracter, una lista con la máscara de los sucesores directos de cada estado.
+        for i in range(0, len(self.vertices)):
+            for character, destinos in automata.adjacency[self.vertices[i]].items():
+                if character not in self.sucesores:
+                    self.sucesores[character] = [0] * len(self.vertices)
+                mask = 0
+                for d in destinos:
+                    mask |= 1 << self.numeros[d]
+                self.sucesores[character][i] = mask
+
+        self.closures = {}      # Cache: para cada caracter, la cerradura de cada estado (None si todavía no se calcula).
+        self.move_closures = {}     # Cache: para cada caracter, la cerradura épsilon de los sucesores de cada estado con ese caracter.
+        self.closure_calls = 0  # Contadores para las estadísticas: consultas a cada cache y cuántas ya estaban calculadas.
+        self.closure_hits = 0
+        self.move_calls = 0
+        self.move_hits = 0
+
+    def from_vertices(self, vlist):     # Convierte una lista de estados en bitset.
+        mask = 0
+        for v in vlist:
+            mask |= 1 << self.numeros[v]
+        return mask
+
+    def to_vertices(self, mask):    # Convierte un bitset en la lista de sus estados, ordenados por su bit.
+        vlist = []
+        while mask:
+            low = mask & -mask  # Bit encendido más bajo.
+            vlist.append(self.vertices[low.bit_length() - 1])
+            mask ^= low
+        return vlist
+
+    def state_closure(self, i, character=EPSILON):  # Cerradura del estado i: todos los estados alcanzables con 0 o más transiciones character.
+        if character not in self.closures:
+            self.closures[character] = [None] * len(self.vertices)
+        cache = self.closures[character]
+        self.closure_calls += 1
+        if cache[i] is not None:
+            self.closure_hits += 1
+            return cache[i]
+
+        sucesores = self.sucesores.get(character)
+        mask = 1 << i
+        pila = [i]      # Recorrido iterativo con el propio bitset como conjunto de visitados, así los ciclos no se repiten y no hay recursión.
+        while pila and sucesores is not None:
+            destinos = sucesores[pila.pop()] & ~mask
+            while destinos:
+                low = destinos & -destinos
+                destinos ^= low
+                k = low.bit_length() - 1
+                if cache[k] is not None:    # Si ya conocemos la cerradura de ese estado la agregamos completa sin recorrerla.
+                    mask |= cache[k]
+                    destinos &= ~mask
+                else:
+                    mask |= low
+                    pila.append(k)
+        cache[i] = mask
+        return mask
+
+    def closure(self, mask, character=EPSILON):     # Cerradura de un conjunto de estados.
+        result = mask
+        state_closure = self.state_closure
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            result |= state_closure(low.bit_length() - 1, character)
+        return result
+
+    def move(self, mask, character):    # Conjunto de estados a los que se llega desde mask con una transición character.
+        sucesores = self.sucesores.get(character)
+        result = 0
+        if sucesores is None:
+            return result
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            result |= sucesores[low.bit_length() - 1]
+        return result
+
+    def move_closure(self, mask, character):    # Cerradura épsilon del move de mask con character, que es el paso de la construcción de subconjuntos.
+        sucesores = self.sucesores.get(character)
+        result = 0
+        if sucesores is None:
+            return result
+        if character not in self.move_closures:
+            self.move_closures[character] = [None] * len(self.vertices)
+        cache = self.move_closures[character]
+        consultas = 0
+        calculadas = 0
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            i = low.bit_length() - 1
+            c = cache[i]
+            consultas += 1
+            if c is None:   # Cada estado calcula la cerradura de sus sucesores una sola vez.
+                c = self.closure(sucesores[i])
+                cache[i] = c
+                calculadas += 1
+            result |= c
+        self.move_calls += consultas
+        self.move_hits += consultas - calculadas
+        return result
+
+    def get_stats(self):    # Devuelve las consultas y los aciertos de los caches de cerraduras y de move_closure.
+        return {"closure_calls": self.closure_calls, "closure_hits": self.closure_hits, "move_calls": self.move_calls, "move_hits": self.move_hits}
+
+def cerradura(automata, v, trans):  # Función que devuelve el move (lista de estados) a partir de un estado y de una transición, siguiendo la transición las veces que se pueda.
+    engine = automata.get_closure_engine()
+    return engine.to_vertices(engine.closure(engine.move(1 << engine.numeros[v], trans), trans))
 
 def move(automata, vlist, trans):   # Función que devuelve el move a partir de una lista de estado y una transición.
-    closure = []
-    for vertex in vlist:    # Mismo funcionamiento que cerradura() pero se aplica a una lista de estados.
-        neigh = automata.get_neighbours(vertex)
-        for i in range(0, len(neigh)):
-            if str(neigh[i][1]) == trans:
-                vert = automata.get_vertex(str(neigh[i][0]))
-                if vert not in closure:
-                    closure.append(vert)
-                closure.extend(cerradura(automata, vert, trans))
-    closure.sort(key = lambda x: x.name)
-    return closure
+    engine = automata.get_closure_engine()
+    return engine.to_vertices(engine.closure(engine.move(engine.from_vertices(vlist), trans), trans))
 
 def cerraduraItmem(automata, vlist, trans):     # Función que devuelve la cerradura a partir de una lista de estados. Solo se usa bajo la transición epsilon (#)
-    closure = []     # Mismo funcionamiento que move() pero agrega los estadoss de entrada al resultado.
-    for vertms in vlist:
-        if vertms not in closure:
-            closure.append(vertms)
-
-    for vertex in vlist:
-        neigh = automata.get_neighbours(vertex)
-
-        for i in range(0, len(neigh)):
-            if str(neigh[i][1]) == trans:
-                vert = automata.get_vertex(str(neigh[i][0]))
-                if vert not in closure:
-                    closure.append(vert)
-                closure.extend(cerradura(automata, vert, trans))
-    closure.sort(key = lambda x: x.name)
-    return closure
-
-vlist = []
-estados = ["A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O", "P", "Q", "R", "S", "T", "U", "V", "W", "X", "Y", "Z"] # Lista de nombres que pueden tener los estados del DFA
-dict_estados = {}   # Diccionario donde se guardarán los datos de los estados del DFA
-
-DFA = Directed_Graph()
-
-def get_cerraduras(NFA):
-    global dict_estados
-    global estados
-    global alfabeto
-    global DFA
-
-    for v in NFA.graph_dict: 
+    engine = automata.get_closure_engine()      # Mismo funcionamiento que move() pero agrega los estadoss de entrada al resultado.
+    return engine.to_vertices(engine.closure(engine.from_vertices(vlist), trans))
+
+def nombre_estado(numero):  # Nombre del estado número "numero" del DFA: A, B, ..., Z, AA, AB, ... Así no hay límite de estados.
+    nombre = ""
+    numero += 1
+    while numero:
+        numero, resto = divmod(numero - 1, 26)
+        nombre = chr(ord("A") + resto) + nombre
+    return nombre
+
+# Excepción que se lanza cuando la construcción de subconjuntos descubre más estados de los permitidos.
+class State_Limit_Error(ValueError):
+    pass
+
+def build_subsets(NFA, alfabeto, max_states=None):  # Construcción de subconjuntos con lista de trabajo. Devuelve el Closure_Engine, la lista de conjuntos (bitsets) de cada estado del DFA y su tabla de transiciones.
+    engine = NFA.get_closure_engine()
+    begin = []
+    for v in NFA.graph_dict:
         if v.get_begin() == True:
-            vlist.append(v)     # Identifica al estado inicial del NFA para empezar el proceso desde ahí. 
-    cont2 = 0   # Contadores que sirven solo para nombrar estados.
-    cont = 0
-    dict_estados[estados[cont]] = [cerraduraItmem(NFA, vlist, "#"), "#", 0, "", estados[cont2]] # Crea un estado a partir de la cerradura epsilon del estado inicial del NFA
-    # El estado lleva de nombre estados[cont], osea A. 
-    # LLeva como datos:
-    #   [La cerradura epsilon del estado (Lista de estados)
-    #   , la transición con la que se llegó a esa lista (Caracter)
-    #   , el estado del que partió para llegar a esa lista (Caracter)
-    #   , el move al que se le tuvo que haber aplicado la cerradura epsilon para llegar a este estado (lista de estados)]
-    #   , el nombre del estado como se mostrará al volverlo parte del grafo.
-
-    DFA.add_vertex(Vertex(dict_estados[estados[cont]][4])) # Añadimos el estado inicial al DFA
-    cont2 += 1  # Sumamos uno a los contadores ya que el primer identificador interno y externo fueron usados: "A"
-    cont += 1
-    continuar = True 
-
-    while continuar:    # El ciclo continua hasta que ya no existan nuevos estados por descubrir para el DFA.
-        continuar = False   # Si en esta iteración no ocurre ningún cambio, el ciclo termina.
-        dict_estados_temp = dict(dict_estados)  # Hacemos una copia de los contenidos del diccionario de estados con el objetivo de poder modificar el diccionario a la vez que iteramos en él.
-        
-        for estado in dict_estados_temp:    # Iteramos en los estados dentro de la copia del diccionario para generar los moves.
-            for i in range(0, len(alfabeto)):   # Iteramos en cada caracter del alfabeto
-                
-                temp = move(NFA, dict_estados[estado][0], alfabeto[i])  # Hacemos el move del estado correspondiente bajo la letra del alfabeto en la que estemos iterando. Lo guardamos en una variable temporal.
-
-                state_already_exists = False    # Definimos una variable para comprobar si el move ya existe
-                for key in dict_estados:
-                    if(dict_estados[key][0] == temp):   # Si el move ya se encuentra dentro del diccionario de estados, asi lo declaramos y rompemos el ciclo
-                        state_already_exists = True
-                        break
-
-                if state_already_exists == False:   # Si el move no existe aún
-                    dict_estados[estados[cont]] = [temp, alfabeto[i], estado, " "]  # Agregamos el move al diccionario de estados, guardandolo como un estado provisional. 
-                    continuar = True    # Al haber ocurrido un cambio en el diccionario durante esta iteración declaramos que el ciclo debe continuar.
-                    cont += 1
-        
-        dict_estados_temp = dict(dict_estados)  # Actualizamos la copia del diccionario
-        
-        for estado in dict_estados_temp: 
-                if dict_estados[estado][1] in alfabeto:     # Buscamos los moves en el diccionario de estados (los moves corresponden a todos los estados que tienen como transición asociada una letra del alfabeto)
-                    temp = cerraduraItmem(NFA, dict_estados[estado][0], "#") # Creamos una cerradura epsilon para el move en el que estemos iterando
-
-                    state_already_exists = False
-                    for key in dict_estados:    # Comprobamos si la cerradura epsilon ya existe
-                        if(dict_estados[key][0] == temp): #
-                            state_already_exists = True
-                            break
-
-                    if state_already_exists == False:   # Si no existe, agragamos la cerradura al diccionario y creamos un estado correspondiente en el DFA.
-                        dict_estados[estados[cont]] = [temp, "#", estado, dict_estados[estado][0], estados[cont2]] 
-                        DFA.add_vertex(Vertex(dict_estados[estados[cont]][4]))
-                        cont2 += 1
-                        continuar = True
-                        cont += 1
-
-    for estado in dict_estados:     # Al finalizar el ciclo, iteramos en todos los estados (Tanto moves como cerraduras epsilon) del diccionario de estaods
-        if dict_estados[estado][1] == "#":  # Revisamos que ese estado haya surgido de una cerradura epsilon
-            for i in range(0, len(alfabeto)):   # Iteramos para cada letra del alfabeto
-                temp = move(NFA, dict_estados[estado][0], alfabeto[i])  # Creamos un move correspondiente a ese estado con esa letra
-                for key in dict_estados:    # Revisamos el diccionario de estados para encontrar una coincidencia, osease comprobamos el estado al que lleva el move que creamos anteriormente.
-                    if dict_estados[key][1] == "#":
-                        if dict_estados[key][3] == temp: 
-                            DFA.add_edge(Edge(DFA.get_vertex(dict_estados[estado][4]), DFA.get_vertex(dict_estados[key][4]), Transition(alfabeto[i])))  # Al encontrar la coincidencia, creamos una transición entre el estado que creo el move y el estado que recibe ese move.
-    
-    for estado in dict_estados:     
-        if dict_estados[estado][1] == "#":  # Buscamos los estados del DFA (los que surgen de una cerradura épsilon)
-            for vertex in dict_estados[estado][0]:  # Revisamos si entre los estados del NFA que componen a ese estado del DFA está el estado inicial y el estado final.
-                if vertex.get_begin() == True:
-                    v = DFA.get_vertex(dict_estados[estado][4])
-                    v.set_begin(True)   # Si es así, asignamos los estados del DFA según corresponde.
-                if vertex.get_end() == True:
-                    v = DFA.get_vertex(dict_estados[estado][4])
-                    v.set_end(True) 
-
-get_cerraduras(NFA)
-
-print("\nDFA:")
-print(DFA)
\ No newline at end of file
+            begin.append(v)     # Identifica al estado inicial del NFA para empezar el proceso desde ahí.
+
+    inicial = engine.closure(engine.from_vertices(begin))   # El primer estado del DFA es la cerradura épsilon del estado inicial del NFA.
+    numeros = {inicial: 0}  # Índice hash conjunto -> número de estado del DFA, para saber en O(1) si un conjunto ya se descubrió.
+    masks = [inicial]       # Conjunto de estados del NFA que forma cada estado del DFA.
+    transiciones = []       # transiciones[i][j] es el estado al que se llega desde el estado i con alfabeto[j], o -1 si el move es vacío.
+    move_closure = engine.move_closure
+
+    actual = 0
+    while actual < len(masks):  # La lista de estados funciona también como lista de trabajo: cada estado se procesa una sola vez, en el orden en que se descubrió.
+        mask = masks[actual]
+        fila = []
+        for character in alfabeto:
+            temp = move_closure(mask, character)    # Cerradura épsilon del move del estado con esa letra.
+            if not temp:    # El conjunto vacío no es un estado, simplemente no hay transición.
+                fila.append(-1)
+                continue
+            destino = numeros.get(temp)
+            if destino is None:     # Si el conjunto es nuevo le damos el siguiente número.
+                if max_states is not None and len(masks) >= max_states:
+                    raise State_Limit_Error(f"DFA exceeds {max_states} states")
+                destino = len(masks)
+                numeros[temp] = destino
+                masks.append(temp)
+            fila.append(destino)
+        transiciones.append(fila)
+        actual += 1
+
+    return engine, masks, transiciones
+
+def get_cerraduras(NFA, alfabeto, max_states=None):     # Construye y devuelve el DFA equivalente al NFA para el alfabeto dado. Si se da max_states, lanza State_Limit_Error al pasarse de ese número de estados.
+    engine, masks, transiciones = build_subsets(NFA, alfabeto, max_states)
+
+    end = 0
+    for v in NFA.graph_dict:
+        if v.get_end() == True:
+            end |= 1 << engine.numeros[v]
+
+    return build_dfa_graph(transiciones, [bool(mask & end) for mask in masks], alfabeto, NFA.miembros)    # Si entre los estados del NFA que lo componen está el estado final, es estado de aceptación.
+
+def build_dfa_graph(transiciones, accepting, alfabeto, miembros=None):     # Construye el grafo del DFA a partir de su tabla (transiciones[i][j] es el destino del estado i con alfabeto[j], o -1 si no hay transición). El estado 0 es el inicial. miembros es el de Directed_Graph si alfabeto son representantes de clases.
+    DFA = Directed_Graph()
+    DFA.set_miembros(miembros)
+    vertices = []
+    for i in range(0, len(transiciones)):   # Creamos un estado del DFA por cada fila de la tabla.
+        v = Vertex(nombre_estado(i))
+        if i == 0:
+            v.set_begin(True)
+        if accepting[i]:
+            v.set_end(True)
+        DFA.add_vertex(v)
+        vertices.append(v)
+
+    for i in range(0, len(transiciones)):   # Y las transiciones entre ellos.
+        for j in range(0, len(alfabeto)):
+            if transiciones[i][j] >= 0:
+                DFA.add_edge(Edge(vertices[i], vertices[transiciones[i][j]], Transition(alfabeto[j])))
+
+    return DFA
+
+
+# ================================ Construcción directa (Glushkov) ================================
+
+
+# Clase Glushkov_Positions, los conjuntos del autómata de posiciones de Glushkov de un árbol de sintaxis: cada hoja es una posición, y para cada una se calcula qué posiciones pueden seguirle (followpos). No hay transiciones épsilon, así el DFA sale directo de estos conjuntos (bitsets) sin calcular cerraduras.
+class Glushkov_Positions:
+
+    def __init__(self, arbol, clases):
+        self.simbolos = []      # Columnas (clases de símbolos) que acepta cada posición.
+        self.follow = []        # Bitset de las posiciones que pueden seguir a cada posición.
+        valores = []    # Stack de (nullable, first, last) de los nodos ya calculados.
+        pendientes = [(arbol, False)]
+        columnas = clases.get_columnas()
+        self.miembros = clases.get_miembros()
+
+        while pendientes:   # Recorrido en postorden con stack, igual que ast_to_nfa.
+            nodo, listo = pendientes.pop()
+            if isinstance(nodo, frozenset):
+                p = len(self.simbolos)
+                self.simbolos.append(sorted(set(columnas[s] for s in nodo)))
+                self.follow.append(0)
+                valores.append((False, 1 << p, 1 << p))
+            elif not listo:
+                pendientes.append((nodo, True))
+                for hijo in reversed(nodo.get_children()):
+                    pendientes.append((hijo, False))
+            elif nodo.get_operator() == "|":
+                n2, f2, l2 = valores.pop()
+                n1, f1, l1 = valores.pop()
+                valores.append((n1 or n2, f1 | f2, l1 | l2))
+            elif nodo.get_operator() == "·":
+                n2, f2, l2 = valores.pop()
+                n1, f1, l1 = valores.pop()
+                self.add_follow(l1, f2)     # Después del final del primero puede seguir el inicio del segundo.
+                valores.append((n1 and n2, f1 | f2 if n1 else f1, l1 | l2 if n2 else l2))
+            else:   # * y +: después del final puede volver a empezar.
+                n, f, l = valores.pop()
+                self.add_follow(l, f)
+                valores.append((n or nodo.get_operator() == "*", f, l))
+
+        self.nullable, self.first, self.last = valores.pop()
+        self.end = 1 << len(self.simbolos)  # Posición extra que marca el final de la expresión: los estados que la contienen aceptan.
+        self.add_follow(self.last, self.end)
+
+    def add_follow(self, posiciones, siguientes):   # Agrega siguientes al follow de cada posición del bitset posiciones.
+        while posiciones:
+            low = posiciones & -posiciones
+            posiciones ^= low
+            self.follow[low.bit_length() - 1] |= siguientes
+
+    def get_num_positions(self):
+        return len(self.simbolos)
+
+    def get_num_edges(self):    # Transiciones que tendría el NFA de posiciones (una por símbolo de cada posición a la que se puede llegar).
+        total = 0
+        for origen in [self.first] + self.follow:
+            origen &= self.end - 1
+            while origen:
+                low = origen & -origen
+                origen ^= low
+                total += len(self.simbolos[low.bit_length() - 1])
+        return total
+
+    def get_initial(self):  # Estado inicial del DFA: las posiciones con las que puede empezar la expresión, y el final si acepta la cadena vacía.
+        return self.first | (self.end if self.nullable else 0)
+
+    def column_masks(self, width):  # Para cada columna, el bitset de las posiciones que aceptan ese símbolo.
+        masks = [0] * width
+        for p in range(0, len(self.simbolos)):
+            for j in self.simbolos[p]:
+                masks[j] |= 1 << p
+        return masks
+
+    def to_nfa(self, alfabeto):     # NFA de posiciones como Directed_Graph (sin transiciones épsilon), para los motores que necesitan un NFA. El nodo "0" es el inicio y la posición p es el nodo str(p + 1).
+        g = Directed_Graph()
+        g.set_miembros(self.miembros)
+        vertices = [Vertex(str(i)) for i in range(0, len(self.simbolos) + 1)]
+        vertices[0].set_begin(True)
+        vertices[0].set_end(self.nullable)
+        for v in vertices:
+            g.add_vertex(v)
+        for p in range(0, len(self.simbolos)):
+            vertices[p + 1].set_end(bool(self.follow[p] & self.end))
+        origenes = [self.first] + self.follow
+        for i in range(0, len(origenes)):
+            destinos = origenes[i] & (self.end - 1)
+            while destinos:
+                low = destinos & -destinos
+                destinos ^= low
+                p = low.bit_length() - 1
+                for j in self.simbolos[p]:
+                    g.add_edge(Edge(vertices[i], vertices[p + 1], Transition(alfabeto[j])))
+        return g
+
+def glushkov_dfa(posiciones, alfabeto, max_states=None):    # Construye el DFA directo de las posiciones de Glushkov: cada estado es el conjunto de posiciones que pueden leer el siguiente símbolo. Devuelve un DFA con la misma forma que el de get_cerraduras.
+    por_columna = posiciones.column_masks(len(alfabeto))
+    follow = posiciones.follow
+    inicial = posiciones.get_initial()
+    numeros = {inicial: 0}
+    masks = [inicial]
+    transiciones = []
+
+    actual = 0
+    while actual < len(masks):  # Lista de trabajo, igual que build_subsets.
+        mask = masks[actual]
+        fila = []
+        for j in range(0, len(alfabeto)):
+            leidas = mask & por_columna[j]  # Posiciones del estado que aceptan este símbolo.
+            temp = 0
+            while leidas:
+                low = leidas & -leidas
+                leidas ^= low
+                temp |= follow[low.bit_length() - 1]
+            if not temp:
+                fila.append(-1)
+                continue
+            destino = numeros.get(temp)
+            if destino is None:
+                if max_states is not None and len(masks) >= max_states:
+                    raise State_Limit_Error(f"DFA exceeds {max_states} states")
+                destino = len(masks)
+                numeros[temp] = destino
+                masks.append(temp)
+            fila.append(destino)
+        transiciones.append(fila)
+        actual += 1
+
+    return build_dfa_graph(transiciones, [bool(mask & posiciones.end) for mask in masks], alfabeto, posiciones.miembros)
+
+
+# ================================ Minimización ================================
+
+
+def hopcroft(transiciones, accepting):  # Algoritmo de Hopcroft sobre una tabla completa (transiciones[i][j] es el destino del estado i con el símbolo j). accepting[i] es la etiqueta del estado i: la partición inicial agrupa los estados con la misma etiqueta (Ej. True/False). Devuelve el bloque al que pertenece cada estado y el número de bloques.
+    n = len(transiciones)
+    width = len(transiciones[0]) if n else 0
+
+    inversas = []   # inversas[j][t] es la lista de estados que llegan a t con el símbolo j.
+    for j in range(0, width):
+        inversas.append([[] for _ in range(n)])
+    for i in range(0, n):
+        fila = transiciones[i]
+        for j in range(0, width):
+            inversas[j][fila[j]].append(i)
+
+    por_etiqueta = {}   # Partición inicial: un bloque por etiqueta (Ej. estados de aceptación y el resto).
+    bloque = [0] * n
+    bloques = []
+    for i in range(0, n):
+        if accepting[i] not in por_etiqueta:
+            por_etiqueta[accepting[i]] = len(bloques)
+            bloques.append(set())
+        bloque[i] = por_etiqueta[accepting[i]]
+        bloques[bloque[i]].add(i)
+
+    pendientes = []     # Lista de trabajo de pares (bloque, símbolo) con los que hay que refinar la partición.
+    en_pendientes = set()
+    if len(bloques) > 1:
+        mayor = max(range(0, len(bloques)), key=lambda b: len(bloques[b]))     # Basta con todos los bloques menos el más grande.
+        for b in range(0, len(bloques)):
+            if b != mayor:
+                for j in range(0, width):
+                    pendientes.append((b, j))
+                    en_pendientes.add((b, j))
+
+    while pendientes:
+        par = pendientes.pop()
+        en_pendientes.discard(par)
+        b, j = par
+        inversa = inversas[j]
+        afectados = {}  # Estados que llegan al bloque b con el símbolo j, agrupados por el bloque en el que están.
+        for t in bloques[b]:
+            for s in inversa[t]:
+                bs = bloque[s]
+                if bs in afectados:
+                    afectados[bs].append(s)
+                else:
+                    afectados[bs] = [s]
+
+        for bs, miembros in afectados.items():
+            if len(miembros) == len(bloques[bs]):   # Si todo el bloque llega a b no hay nada que separar.
+                continue
+            nuevo = set(miembros)   # Separamos el bloque en los que llegan a b y los que no.
+            bloques[bs] -= nuevo
+            nb = len(bloques)
+            bloques.append(nuevo)
+            for s in nuevo:
+                bloque[s] = nb
+            for k in range(0, width):
+                if (bs, k) in en_pendientes:    # Si el bloque viejo seguía pendiente, también lo debe estar la parte nueva.
+                    pendientes.append((nb, k))
+                    en_pendientes.add((nb, k))
+                else:   # Si no, basta con agregar la parte más pequeña.
+                    menor = nb if len(nuevo) <= len(bloques[bs]) else bs
+                    pendientes.append((menor, k))
+                    en_pendientes.add((menor, k))
+
+    return bloque, len(bloques)
+
+def minimize_dfa(DFA, alfabeto, prune=True):    # Devuelve un nuevo DFA mínimo equivalente. Con prune=True también quita los estados inalcanzables y los estados muertos (desde los que no se llega a aceptación).
+    vertices = list(DFA.graph_dict)
+    n = len(vertices)
+    numeros = {}
+    for i in range(0, n):
+        numeros[vertices[i]] = i
+    columnas = {}
+    for j in range(0, len(alfabeto)):
+        columnas[alfabeto[j]] = j
+
+    transiciones = []   # Tabla completa: las transiciones que no existen van a un estado sumidero extra, el número n.
+    accepting = []
+    start = n
+    for i in range(0, n):
+        fila = [n] * len(alfabeto)
+        for neigh in DFA.get_neighbours(vertices[i]):
+            if neigh[1].get_character() in columnas:
+                fila[columnas[neigh[1].get_character()]] = numeros[neigh[0]]
+        transiciones.append(fila)
+        accepting.append(vertices[i].get_end())
+        if vertices[i].get_begin():
+            start = i
+    transiciones.append([n] * len(alfabeto))
+    accepting.append(False)
+
+    bloque, num_bloques = hopcroft(transiciones, accepting)
+
+    sumidero = bloque[n]    # Bloque del sumidero. Si no tiene estados reales no se muestra; con prune=True tampoco se muestran los estados muertos que cayeron en él.
+    representante = [None] * num_bloques
+    for i in range(n, -1, -1):
+        representante[bloque[i]] = i
+
+    orden = []  # Numeramos los bloques en el orden en que se alcanzan desde el inicio, para que los nombres salgan como en get_cerraduras.
+    nuevos = {}
+    if bloque[start] != sumidero or not prune:
+        nuevos[bloque[start]] = 0
+        orden.append(bloque[start])
+    actual = 0
+    while actual < len(orden):
+        for t in transiciones[representante[orden[actual]]]:
+            b = bloque[t]
+            if b not in nuevos and (b != sumidero or not prune):
+                nuevos[b] = len(orden)
+                orden.append(b)
+        actual += 1
+    if not prune:   # Sin prune también conservamos los bloques inalcanzables.
+        for b in range(0, num_bloques):
+            if b not in nuevos:
+                nuevos[b] = len(orden)
+                orden.append(b)
+    if sumidero in nuevos and representante[sumidero] == n:     # El sumidero solo no es un estado del DFA original.
+        orden.remove(sumidero)
+        del nuevos[sumidero]
+        for b in range(0, len(orden)):
+            nuevos[orden[b]] = b
+
+    minimo = Directed_Graph()
+    minimo.set_miembros(DFA.miembros)
+    estados = []
+    for b in range(0, len(orden)):
+        v = Vertex(nombre_estado(b))
+        r = representante[orden[b]]
+        if bloque[r] == bloque[start]:
+            v.set_begin(True)
+        if accepting[r]:
+            v.set_end(True)
+        minimo.add_vertex(v)
+        estados.append(v)
+    for b in range(0, len(orden)):
+        fila = transiciones[representante[orden[b]]]
+        for j in range(0, len(alfabeto)):
+            destino = bloque[fila[j]]
+            if destino in nuevos:
+                minimo.add_edge(Edge(estados[b], estados[nuevos[destino]], Transition(alfabeto[j])))
+
+    return minimo
+
+
+def equivalent_dfa(dfa1, dfa2, alfabeto):   # Devuelve True si los 2 DFA aceptan exactamente las mismas cadenas. Recorre los pares de estados alcanzables de los dos a la vez; una transición que no existe lleva a un estado muerto (None).
+    def inicio(dfa):
+        for v in dfa.graph_dict:
+            if v.get_begin():
+                return v
+
+    def siguiente(dfa, v, simbolo):
+        if v is None:
+            return None
+        destinos = dfa.get_successors(v, simbolo)
+        return destinos[0] if destinos else None
+
+    par = (inicio(dfa1), inicio(dfa2))
+    vistos = {par}
+    pendientes = [par]
+    while pendientes:
+        v1, v2 = pendientes.pop()
+        if (v1 is not None and v1.get_end()) != (v2 is not None and v2.get_end()):
+            return False
+        for simbolo in alfabeto:
+            par = (siguiente(dfa1, v1, simbolo), siguiente(dfa2, v2, simbolo))
+            if par not in vistos:
+                vistos.add(par)
+                pendientes.append(par)
+    return True
+
+
+# ================================ DFA compilado ================================
+
+# Clase Compiled_DFA, autómata compilado a una tabla de transiciones densa. Sirve para correr cadenas sobre el DFA sin recorrer el grafo.
+class Compiled_DFA:
+
+    def __init__(self, alfabeto, table, start, accepting, names, columnas=None):     # La tabla guarda, para cada estado y cada símbolo, el número del estado destino.
+        self.alfabeto = list(alfabeto)      # Símbolo de cada columna (el representante de su clase).
+        self.width = len(self.alfabeto) + 1     # Cada fila tiene una columna por símbolo más una columna extra para los caracteres fuera del alfabeto.
+        self.columnas = columnas    # Diccionario que traduce cada símbolo del alfabeto a su columna en la tabla. Sin clases, cada símbolo tiene su propia columna.
+        if self.columnas is None:
+            self.columnas = {}
+            for i in range(0, len(self.alfabeto)):
+                self.columnas[self.alfabeto[i]] = i
+        self.table = table      # array de enteros de tamaño estados × width. El estado 0 es el estado muerto y todas sus transiciones llevan a él mismo.
+        self.start = start
+        self.accepting = accepting      # bytes con un 1 en la posición de cada estado de aceptación.
+        self.names = names      # Nombre que tenía cada estado en el grafo del DFA (el estado muerto no tiene nombre).
+        self.byte_columnas = [self.width - 1] * 256     # Columna de cada byte, para correr el autómata sobre bytes sin decodificarlos. Un byte corresponde al símbolo con ese mismo código.
+        for simbolo, col in self.columnas.items():
+            if ord(simbolo) < 256:
+                self.byte_columnas[ord(simbolo)] = col
+        self.unanchored_dfa = None  # Unanchored_DFA de este DFA, se crea la primera vez que se necesita.
+        self.np_tables = None   # Tablas en NumPy para las funciones por lotes.
+        self.prefix = ""        # Literales de la expresión para el prefiltro de search (ver required_literals).
+        self.required = ""
+        self.required_bytes = b""   # required en bytes (un byte por símbolo, como byte_columnas), o b"" si tiene símbolos fuera de 0-255.
+
+    def set_literals(self, prefix, required):
+        self.prefix = prefix
+        self.required = required
+        self.required_bytes = b""
+        if all(ord(c) < 256 for c in required):
+            self.required_bytes = required.encode("latin-1")
+
+    def get_num_states(self):
+        return len(self.accepting)
+
+    def fullmatch(self, cadena):    # Devuelve verdadero si el autómata acepta la cadena completa.
+        table = self.table      # Guardamos los atributos en variables locales para que el ciclo no tenga que buscarlos en cada caracter.
+        width = self.width
+        columnas = self.columnas
+        otro = width - 1
+        s = self.start
+        for c in cadena:
+            s = table[s * width + columnas.get(c, otro)]
+            if not s:   # Si caemos en el estado muerto ya no hay forma de aceptar.
+                return False
+        return self.accepting[s] == 1
+
+    def match(self, cadena, pos=0):     # Devuelve el final del match más largo que empieza en pos, o None si ningún prefijo es aceptado.
+        table = self.table
+        width = self.width
+        columnas = self.columnas
+        accepting = self.accepting
+        otro = width - 1
+        s = self.start
+        fin = pos if accepting[s] else None     # Si el estado inicial es de aceptación, la cadena vacía ya es un match.
+        for i in range(pos, len(cadena)):
+            s = table[s * width + columnas.get(cadena[i], otro)]
+            if not s:
+                break
+            if accepting[s]:
+                fin = i + 1
+        return fin
+
+    def search(self, cadena, pos=0):    # Devuelve (inicio, fin) del primer match dentro de la cadena, tomando el más largo desde ese inicio, o None si no hay ninguno. Solo se intenta desde las posiciones que deja el prefiltro de literales.
+        for inicio in candidate_starts(cadena, pos, self.prefix, self.required):
+            fin = self.match(cadena, inicio)
+            if fin is not None:
+                return (inicio, fin)
+        return None
+
+    def __str__(self):  # Imprime la tabla de transiciones con una fila por estado, con una transición por cada símbolo de la clase de cada columna.
+        miembros = class_members(self.alfabeto, self.columnas)
+        lineas = []
+        for s in range(1, self.get_num_states()):
+            fila = self.table[s * self.width:(s + 1) * self.width - 1]
+            destinos = ", ".join("(" + self.names[t] + ", '" + simbolo + "')" for i, t in enumerate(fila) if t for simbolo in miembros[self.alfabeto[i]])
+            linea = self.names[s] + " => [" + destinos + "]"
+            if s == self.start:
+                linea += " Start"
+            if self.accepting[s]:
+                linea += " Accept"
+            lineas.append(linea)
+        return "\n".join(lineas)
+
+    def numpy_tables(self):     # Tablas en NumPy para encode_batch y fullmatch_batch, se construyen la primera vez que se usan.
+        if self.np_tables is not None:
+            return self.np_tables
+        if np is None:
+            raise ImportError("batch matching requires numpy")
+        tabla = np.asarray(self.table, dtype=np.int32).reshape(-1, self.width)
+        relleno = np.arange(len(tabla), dtype=np.int32).reshape(-1, 1)     # Una columna más al final para el relleno (-1), con la que cada estado se queda en sí mismo.
+        tabla = np.hstack((tabla, relleno))
+        aceptacion = np.frombuffer(bytes(self.accepting), dtype=np.uint8).astype(bool)
+        bytes_columnas = np.array(self.byte_columnas, dtype=np.int32)
+
+        mayor = max((ord(s) for s in self.columnas), default=0)
+        if mayor < 65536:   # Alfabetos chicos: tabla directa código -> columna, con una entrada extra para todo lo que esté fuera.
+            puntos_columnas = np.full(mayor + 2, self.width - 1, dtype=np.int32)
+            for s, col in self.columnas.items():
+                puntos_columnas[ord(s)] = col
+        else:   # Alfabetos Unicode grandes: códigos ordenados para buscar con búsqueda binaria.
+            simbolos = np.array([ord(s) for s in self.columnas], dtype=np.uint32)
+            orden = np.argsort(simbolos)
+            puntos_columnas = (simbolos[orden], np.array(list(self.columnas.values()), dtype=np.int32)[orden])
+        self.np_tables = (tabla, aceptacion, bytes_columnas, puntos_columnas)
+        return self.np_tables
+
+    def encode_batch(self, cadenas):    # Convierte una lista de cadenas (str o bytes) en un arreglo de NumPy de columnas, una fila por cadena, rellenado con -1 al final de las cadenas más cortas.
+        tabla, aceptacion, bytes_columnas, puntos_columnas = self.numpy_tables()
+        longitudes = np.fromiter((len(c) for c in cadenas), dtype=np.int64, count=len(cadenas))
+        codigos = np.full((len(cadenas), int(longitudes.max()) if len(cadenas) else 0), -1, dtype=np.int32)
+        if not len(cadenas) or not longitudes.sum():
+            return codigos
+
+        if isinstance(cadenas[0], (bytes, bytearray)):  # Todas las cadenas juntas en un solo buffer, traducidas con una sola lectura vectorizada.
+            columnas = bytes_columnas[np.frombuffer(b"".join(cadenas), dtype=np.uint8)]
+        else:
+            puntos = np.frombuffer("".join(cadenas).encode("utf-32-le"), dtype=np.uint32)
+            if isinstance(puntos_columnas, tuple):
+                simbolos, valores = puntos_columnas
+                posicion = np.minimum(np.searchsorted(simbolos, puntos), len(simbolos) - 1)
+                columnas = np.where(simbolos[posicion] == puntos, valores[posicion], self.width - 1).astype(np.int32)
+            else:
+                columnas = puntos_columnas[np.minimum(puntos, len(puntos_columnas) - 1)]
+
+        filas = np.repeat(np.arange(len(cadenas)), longitudes)  # Fila y posición de cada caracter del buffer.
+        inicios = np.cumsum(longitudes) - longitudes
+        posiciones = np.arange(len(columnas)) - np.repeat(inicios, longitudes)
+        codigos[filas, posiciones] = columnas
+        return codigos
+
+    def fullmatch_batch(self, cadenas):     # Devuelve un arreglo de NumPy de booleanos con fullmatch de cada cadena. Todas avanzan juntas por la tabla: una sola lectura vectorizada por posición. También acepta directamente el arreglo de encode_batch.
+        tabla, aceptacion, bytes_columnas, puntos_columnas = self.numpy_tables()
+        codigos = cadenas if isinstance(cadenas, np.ndarray) else self.encode_batch(cadenas)
+        estados = np.full(len(codigos), self.start, dtype=np.int32)
+        for j in range(0, codigos.shape[1] if codigos.ndim == 2 else 0):
+            estados = tabla[estados, codigos[:, j]]
+            if not estados.any():   # Todas las cadenas cayeron en el estado muerto.
+                break
+        return aceptacion[estados]
+
+    def unanchored(self):   # Devuelve el Unanchored_DFA de este DFA, que acepta en cada posición en la que termina algún match (acepta Σ*R). Sirve para buscar sin reiniciar desde cada posición. Sus estados se calculan conforme la entrada los necesita, en un cache de tamaño limitado.
+        if self.unanchored_dfa is None:
+            self.unanchored_dfa = Unanchored_DFA(self)
+        return self.unanchored_dfa
+
+    def iter_lines(self, source, search=False, chunk_size=65536):   # Generador que devuelve (número de línea, aceptada) por cada línea de source. Con search=True una línea es aceptada si contiene algún match, si no tiene que ser aceptada completa.
+        if search and self.required_bytes:
+            yield from self.iter_lines_literal(source, chunk_size)
+            return
+        if search:
+            yield from self.unanchored().iter_lines(source, chunk_size)
+            return
+        table = self.table
+        width = self.width
+        byte_columnas = self.byte_columnas
+        accepting = self.accepting
+        start = self.start
+        s = start
+        linea = 0
+        pendiente = False   # Si hay bytes de una línea que todavía no termina.
+        for trozo in iter_chunks(source, chunk_size):   # El estado se conserva entre trozos, así una línea puede quedar partida entre dos.
+            for b in trozo:
+                if b == 10:     # Salto de línea.
+                    yield (linea, accepting[s] == 1)
+                    linea += 1
+                    s = start
+                    pendiente = False
+                    continue
+                pendiente = True
+                if s:
+                    s = table[s * width + byte_columnas[b]]
+        if pendiente:   # La última línea puede no terminar en salto de línea.
+            yield (linea, accepting[s] == 1)
+
+    def iter_lines_literal(self, source, chunk_size=65536):    # iter_lines con search=True cuando la expresión tiene un literal obligatorio: las líneas que no lo contienen (bytes.find) se rechazan sin correr el autómata. Una línea partida entre trozos se corre trozo por trozo, y el literal se busca también en los últimos len(requerido) - 1 bytes de la línea en el trozo anterior, así nunca se guarda la línea completa.
+        dfa = self.unanchored()
+        requerido = self.required_bytes
+        solape = len(requerido) - 1
+        linea = 0
+        s = None        # Estado del autómata en la línea que quedó partida entre trozos, o None si la siguiente línea empieza en el trozo.
+        visto = False   # Si la línea partida ya pasó por un estado de aceptación.
+        tiene = False   # Si en la línea partida ya apareció el literal.
+        cola = b""      # Últimos bytes de la línea partida, para encontrar el literal aunque quede partido entre dos trozos.
+        for trozo in iter_chunks(source, chunk_size):
+            datos = bytes(trozo)    # Una sola copia del tamaño del trozo, para poder usar bytes.find.
+            fin = datos.find(b"\n")
+            inicio = 0
+            if s is not None:   # Primero la parte de la línea partida que está en este trozo.
+                final = fin if fin >= 0 else len(datos)
+                if not tiene:
+                    tiene = (cola + datos[:min(final, solape)]).find(requerido) >= 0 or datos.find(requerido, 0, final) >= 0
+                if not visto:
+                    s, visto = dfa.advance(s, datos, 0, final)
+                if fin < 0:
+                    if solape:
+                        cola = (cola + datos[-solape:])[-solape:]
+                    continue
+                yield (linea, tiene and visto)
+                linea += 1
+                s = None
+                inicio = fin + 1
+                fin = datos.find(b"\n", inicio)
+            while fin >= 0:
+                yield (linea, datos.find(requerido, inicio, fin) >= 0 and dfa.accepts_in(datos, inicio, fin))
+                linea += 1
+                inicio = fin + 1
+                fin = datos.find(b"\n", inicio)
+            if inicio < len(datos):     # La línea sigue en el siguiente trozo.
+                tiene = datos.find(requerido, inicio) >= 0
+                s, visto = dfa.advance(dfa.start, datos, inicio, len(datos))
+                cola = datos[max(inicio, len(datos) - solape):] if solape else b""
+        if s is not None:   # La última línea puede no terminar en salto de línea.
+            yield (linea, tiene and visto)
+
+    def iter_match_ends(self, source, chunk_size=65536):    # Generador con la posición (en bytes, desde el inicio de source) en la que termina cada match.
+        dfa = self.unanchored()
+        filas = dfa.filas
+        compute = dfa.compute
+        byte_columnas = self.byte_columnas
+        accepting = dfa.accepting
+        s = dfa.start
+        if accepting[s]:    # El patrón acepta la cadena vacía.
+            yield 0
+        base = 0
+        for trozo in iter_chunks(source, chunk_size):
+            for b in trozo:
+                col = byte_columnas[b]
+                t = filas[s][col]
+                s = t if t >= 0 else compute(s, col)
+                base += 1
+                if accepting[s]:
+                    yield base
+
+def compile_dfa(dfa, alfabeto, columnas=None):     # Convierte el DFA que genera get_cerraduras en un Compiled_DFA. columnas es el de Symbol_Classes si el DFA está sobre representantes de clases.
+    predecesores = {}   # Primero buscamos los estados desde los que se puede llegar a un estado de aceptación, con un solo recorrido hacia atrás desde ellos. Los demás se juntan en el estado muerto.
+    for v in dfa.graph_dict:
+        for neigh in dfa.get_neighbours(v):
+            predecesores.setdefault(neigh[0], []).append(v)
+    vivos = set(v for v in dfa.graph_dict if v.get_end())
+    pendientes = deque(vivos)
+    while pendientes:
+        for v in predecesores.get(pendientes.popleft(), ()):
+            if v not in vivos:
+                vivos.add(v)
+                pendientes.append(v)
+
+    numeros = {}    # Numeramos los estados vivos a partir del 1, el 0 es el estado muerto.
+    names = [""]
+    for v in dfa.graph_dict:
+        if v in vivos:
+            numeros[v] = len(names)
+            names.append(v.get_name())
+
+    compilado_alfabeto = list(alfabeto)
+    width = len(compilado_alfabeto) + 1
+    por_simbolo = {}    # Columna de cada símbolo del DFA.
+    for i in range(0, len(compilado_alfabeto)):
+        por_simbolo[compilado_alfabeto[i]] = i
+
+    table = array("i", bytes(4 * len(names) * width))  # Tabla llena de ceros, o sea, toda transición lleva al estado muerto hasta que la definamos.
+    accepting = bytearray(len(names))
+    start = 0
+    for v in numeros:
+        s = numeros[v]
+        if v.get_begin():
+            start = s
+        if v.get_end():
+            accepting[s] = 1
+        for neigh in dfa.get_neighbours(v):
+            if neigh[0] in numeros and neigh[1].get_character() in por_simbolo:
+                table[s * width + por_simbolo[neigh[1].get_character()]] = numeros[neigh[0]]
+
+    return Compiled_DFA(compilado_alfabeto, table, start, bytes(accepting), names, columnas)
+
+
+
+# ================================ Streaming ================================
+
+
+def iter_chunks(source, chunk_size=65536):  # Generador de trozos de source como memoryview, sin copiarlos. source puede ser la ruta de un archivo (se lee con mmap), un archivo abierto en binario, o bytes/bytearray/mmap/memoryview.
+    if isinstance(source, str):
+        with open(source, "rb") as archivo:
+            if archivo.seek(0, 2) == 0:     # mmap no acepta archivos vacíos.
+                return
+            with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                yield from iter_chunks(mapa, chunk_size)
+        return
+
+    if hasattr(source, "readinto"):     # Archivo abierto: siempre se lee en el mismo buffer.
+        buffer = bytearray(chunk_size)
+        with memoryview(buffer) as vista:
+            while True:
+                leidos = source.readinto(buffer)
+                if not leidos:
+                    break
+                with vista[:leidos] as trozo:
+                    yield trozo
+        return
+
+    with memoryview(source) as vista:   # Bytes en memoria o mmap: los trozos son vistas del mismo buffer.
+        for inicio in range(0, len(vista), chunk_size):
+            with vista[inicio:inicio + chunk_size] as trozo:
+                yield trozo
+
+
+# ================================ DFA perezoso ================================
+
+
+# Clase Lazy_DFA, DFA que se construye sobre la marcha a partir del NFA. Solo crea los estados a los que llega la entrada, y los guarda en un cache de tamaño limitado.
+class Lazy_DFA:
+
+    def __init__(self, nfa, alfabeto, max_states=10000, max_flushes=8, columnas=None):  # max_states es el tamaño del cache en estados. Si en una sola búsqueda hay que vaciarlo más de max_flushes veces, el resto se simula directo en el NFA.
+        self.engine = nfa.get_closure_engine()
+        self.alfabeto = list(alfabeto)
+        self.width = len(self.alfabeto) + 1     # Igual que en Compiled_DFA, la última columna es para los caracteres fuera del alfabeto.
+        self.columnas = columnas
+        if self.columnas is None:
+            self.columnas = {}
+            for i in range(0, len(self.alfabeto)):
+                self.columnas[self.alfabeto[i]] = i
+        self.max_states = max(max_states, 3)    # Se necesitan al menos el estado muerto, el inicial y uno más.
+        self.max_flushes = max_flushes
+
+        begin = []
+        self.end_mask = 0
+        for v in nfa.graph_dict:
+            if v.get_begin():
+                begin.append(v)
+            if v.get_end():
+                self.end_mask |= 1 << self.engine.numeros[v]
+        self.start_mask = self.engine.closure(self.engine.from_vertices(begin))
+
+        self.masks = []     # Conjunto de estados del NFA de cada estado del cache.
+        self.numeros = {}   # Índice conjunto -> número de estado.
+        self.filas = []     # filas[s][col] es el destino de s con esa columna, o -1 si todavía no se calcula.
+        self.accepting = bytearray()
+        self.misses = 0     # Transiciones que hubo que calcular.
+        self.steps = 0      # Transiciones recorridas en total, los hits son steps - misses.
+        self.flushes = 0    # Veces que se vació el cache.
+        self.fallbacks = 0  # Veces que se terminó una búsqueda simulando el NFA.
+        self.prefix = ""    # Literales para el prefiltro de search, igual que en Compiled_DFA.
+        self.required = ""
+        self.flush()
+
+    def set_literals(self, prefix, required):
+        self.prefix = prefix
+        self.required = required
+
+    def flush(self):    # Vacía el cache dejando solo el estado muerto (0) y el inicial (1). Se modifica en su lugar para que las referencias locales sigan siendo válidas.
+        self.masks.clear()
+        self.numeros.clear()
+        del self.filas[:]
+        self.accepting.clear()
+        self.add_state(0)
+        self.filas[0][:] = [0] * self.width     # El estado muerto siempre se queda en sí mismo.
+        self.start = self.add_state(self.start_mask)
+
+    def add_state(self, mask):  # Agrega un conjunto al cache y devuelve su número.
+        s = len(self.masks)
+        self.numeros[mask] = s
+        self.masks.append(mask)
+        fila = [-1] * self.width
+        fila[-1] = 0    # Los caracteres fuera del alfabeto siempre llevan al estado muerto.
+        self.filas.append(fila)
+        self.accepting.append(1 if mask & self.end_mask else 0)
+        return s
+
+    def compute(self, s, col):  # Calcula la transición de s con la columna col, vaciando el cache si ya no cabe un estado más. Devuelve el número del destino.
+        self.misses += 1
+        mask = self.engine.move_closure(self.masks[s], self.alfabeto[col])
+        t = self.numeros.get(mask)
+        if t is None:
+            if len(self.masks) >= self.max_states:
+                self.flush()
+                self.flushes += 1
+                t = self.numeros.get(mask)  # Puede ser el inicial, que siempre está.
+                if t is None:
+                    t = self.add_state(mask)
+                return t    # La fila de s ya no existe después de vaciar, así que no guardamos la transición.
+            t = self.add_state(mask)
+        self.filas[s][col] = t
+        return t
+
+    def get_num_states(self):
+        return len(self.masks)
+
+    def get_stats(self):    # Estadísticas del cache.
+        return {"states": len(self.masks), "hits": self.steps - self.misses, "misses": self.misses, "flushes": self.flushes, "fallbacks": self.fallbacks}
+
+    def nfa_match(self, mask, cadena, pos, fin):    # Continúa un match desde el conjunto mask simulando el NFA directamente, sin crear estados. Las transiciones del NFA son los representantes de clases, así que cada caracter se traduce al de su columna.
+        move_closure = self.engine.move_closure
+        end_mask = self.end_mask
+        columnas = self.columnas
+        alfabeto = self.alfabeto
+        for i in range(pos, len(cadena)):
+            if cadena[i] not in columnas:
+                break
+            mask = move_closure(mask, alfabeto[columnas[cadena[i]]])
+            if not mask:
+                break
+            if mask & end_mask:
+                fin = i + 1
+        return fin
+
+    def match(self, cadena, pos=0):     # Devuelve el final del match más largo que empieza en pos, o None si ningún prefijo es aceptado.
+        filas = self.filas
+        columnas = self.columnas
+        accepting = self.accepting
+        otro = self.width - 1
+        flushes = self.flushes
+        s = self.start
+        fin = pos if accepting[s] else None
+        i = pos
+        for i in range(pos, len(cadena)):
+            col = columnas.get(cadena[i], otro)
+            t = filas[s][col]
+            if t < 0:
+                t = self.compute(s, col)
+                if self.flushes - flushes > self.max_flushes:   # El cache se está vaciando demasiado: terminamos con el NFA.
+                    self.fallbacks += 1
+                    self.steps += i + 1 - pos
+                    if accepting[t]:
+                        fin = i + 1
+                    return self.nfa_match(self.masks[t], cadena, i + 1, fin)
+            s = t
+            if not s:
+                break
+            if accepting[s]:
+                fin = i + 1
+        self.steps += i + 1 - pos if len(cadena) > pos else 0
+        return fin
+
+    def fullmatch(self, cadena):    # Devuelve verdadero si el autómata acepta la cadena completa.
+        filas = self.filas
+        columnas = self.columnas
+        otro = self.width - 1
+        flushes = self.flushes
+        s = self.start
+        for i in range(0, len(cadena)):
+            col = columnas.get(cadena[i], otro)
+            t = filas[s][col]
+            if t < 0:
+                t = self.compute(s, col)
+                if self.flushes - flushes > self.max_flushes:
+                    self.fallbacks += 1
+                    self.steps += i + 1
+                    mask = self.masks[t]
+                    for c in cadena[i + 1:]:
+                        if c not in columnas:
+                            return False
+                        mask = self.engine.move_closure(mask, self.alfabeto[columnas[c]])
+                    return bool(mask & self.end_mask)
+            s = t
+            if not s:
+                self.steps += i + 1
+                return False
+        self.steps += len(cadena)
+        return self.accepting[s] == 1
+
+    def search(self, cadena, pos=0):    # Devuelve (inicio, fin) del primer match dentro de la cadena, o None si no hay ninguno.
+        for inicio in candidate_starts(cadena, pos, self.prefix, self.required):
+            fin = self.match(cadena, inicio)
+            if fin is not None:
+                return (inicio, fin)
+        return None
+
+
+# Clase Unanchored_DFA, la versión sin ancla (Σ*R) de un Compiled_DFA construida sobre la marcha. Cada estado es el conjunto (bitset) de estados del DFA original activos en una posición, con el inicio siempre activo; igual que en Lazy_DFA solo se calculan las transiciones que usa la entrada y el cache se vacía al llenarse, así la memoria no depende de la entrada ni del tamaño que tendría el DFA sin ancla completo.
+class Unanchored_DFA:
+
+    def __init__(self, dfa, max_states=10000, matches=None):     # Con matches (la tupla de patrones de cada estado de un Pattern_Set), cada estado guarda en etiquetas la tupla de patrones que acepta.
+        self.dfa = dfa
+        self.width = dfa.width
+        self.byte_columnas = dfa.byte_columnas
+        self.max_states = max(max_states, 2)    # Se necesitan al menos el inicial y uno más.
+        self.matches = matches
+        self.start_mask = 1 << dfa.start
+        self.masks = []     # Conjunto de estados del DFA original de cada estado del cache.
+        self.numeros = {}   # Índice conjunto -> número de estado.
+        self.filas = []     # filas[s][col] es el destino de s con esa columna, o -1 si todavía no se calcula.
+        self.accepting = bytearray()
+        self.etiquetas = []     # Solo con matches: la tupla de patrones que acepta cada estado.
+        self.misses = 0     # Transiciones que hubo que calcular.
+        self.flushes = 0    # Veces que se vació el cache.
+        self.start = 0      # El inicial siempre es el estado 0.
+        self.flush()
+
+    def flush(self):    # Vacía el cache dejando solo el estado inicial. Se modifica en su lugar para que las referencias locales sigan siendo válidas.
+        self.masks.clear()
+        self.numeros.clear()
+        del self.filas[:]
+        self.accepting.clear()
+        del self.etiquetas[:]
+        self.add_state(self.start_mask)
+
+    def add_state(self, mask):  # Agrega un conjunto al cache y devuelve su número.
+        s = len(self.masks)
+        self.numeros[mask] = s
+        self.masks.append(mask)
+        self.filas.append([-1] * self.width)
+        acepta = False
+        ids = set()
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            estado = low.bit_length() - 1
+            acepta = acepta or self.dfa.accepting[estado] == 1
+            if self.matches is not None:
+                ids.update(self.matches[estado])
+        self.accepting.append(1 if acepta else 0)
+        if self.matches is not None:
+            self.etiquetas.append(tuple(sorted(ids)))
+        return s
+
+    def compute(self, s, col):  # Calcula la transición de s con la columna col, vaciando el cache si ya no cabe un estado más. Devuelve el número del destino.
+        self.misses += 1
+        table = self.dfa.table
+        width = self.width
+        mask = self.masks[s]
+        destino = self.start_mask   # El inicio siempre vuelve a estar activo, así un match puede empezar en cualquier posición.
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            t = table[(low.bit_length() - 1) * width + col]
+            if t:
+                destino |= 1 << t
+        t = self.numeros.get(destino)
+        if t is None:
+            if len(self.masks) >= self.max_states:
+                self.flush()
+                self.flushes += 1
+                t = self.numeros.get(destino)   # Puede ser el inicial, que siempre está.
+                if t is None:
+                    t = self.add_state(destino)
+                return t    # La fila de s ya no existe después de vaciar, así que no guardamos la transición.
+            t = self.add_state(destino)
+        self.filas[s][col] = t
+        return t
+
+    def get_num_states(self):
+        return len(self.masks)
+
+    def get_stats(self):    # Estadísticas del cache.
+        return {"states": len(self.masks), "misses": self.misses, "flushes": self.flushes}
+
+    def advance(self, s, datos, inicio, fin):   # Corre los bytes datos[inicio:fin] desde el estado s. Devuelve (estado, aceptó): se detiene en cuanto pasa por un estado de aceptación.
+        filas = self.filas
+        compute = self.compute
+        byte_columnas = self.byte_columnas
+        accepting = self.accepting
+        for i in range(inicio, fin):
+            col = byte_columnas[datos[i]]
+            t = filas[s][col]
+            s = t if t >= 0 else compute(s, col)
+            if accepting[s]:
+                return s, True
+        return s, False
+
+    def accepts_in(self, datos, inicio, fin):   # Devuelve verdadero si los bytes datos[inicio:fin] contienen un match.
+        return self.advance(self.start, datos, inicio, fin)[1]
+
+    def iter_lines(self, source, chunk_size=65536):     # Generador con (número de línea, tiene algún match) por cada línea de source, para Compiled_DFA.iter_lines con search=True.
+        filas = self.filas
+        compute = self.compute
+        byte_columnas = self.byte_columnas
+        accepting = self.accepting
+        start = self.start
+        s = start
+        visto = accepting[s] == 1   # Si en la línea actual ya se llegó a un estado de aceptación.
+        linea = 0
+        pendiente = False   # Si hay bytes de una línea que todavía no termina.
+        for trozo in iter_chunks(source, chunk_size):
+            for b in trozo:
+                if b == 10:     # Salto de línea.
+                    yield (linea, visto)
+                    linea += 1
+                    s = start
+                    visto = accepting[s] == 1
+                    pendiente = False
+                    continue
+                pendiente = True
+                if not visto:   # Con un match basta, el resto de la línea no cambia la respuesta.
+                    col = byte_columnas[b]
+                    t = filas[s][col]
+                    s = t if t >= 0 else compute(s, col)
+                    visto = accepting[s] == 1
+        if pendiente:   # La última línea puede no terminar en salto de línea.
+            yield (linea, visto)
+
+
+# ================================ Simulación del NFA ================================
+
+
+# Clase NFA_Simulator, corre las cadenas directamente sobre el NFA sin construir ningún DFA. El conjunto de estados activos es un bitset y cada caracter se resuelve con máscaras precalculadas.
+class NFA_Simulator:
+
+    def __init__(self, nfa, alfabeto, columnas=None):
+        engine = nfa.get_closure_engine()
+        self.alfabeto = list(alfabeto)
+        self.num_states = len(engine.vertices)
+        self.columnas = columnas
+        if self.columnas is None:
+            self.columnas = {}
+            for i in range(0, len(self.alfabeto)):
+                self.columnas[self.alfabeto[i]] = i
+
+        begin = []
+        self.end_mask = 0
+        for v in nfa.graph_dict:
+            if v.get_begin():
+                begin.append(v)
+            if v.get_end():
+                self.end_mask |= 1 << engine.numeros[v]
+        self.start_mask = engine.closure(engine.from_vertices(begin))
+
+        self.pasos = []     # pasos[col][i] es la cerradura épsilon de los sucesores del estado i con el símbolo de esa columna.
+        for character in self.alfabeto:
+            self.pasos.append([engine.move_closure(1 << i, character) for i in range(0, self.num_states)])
+        self.prefix = ""    # Literales para el prefiltro de search, igual que en Compiled_DFA.
+        self.required = ""
+
+    def set_literals(self, prefix, required):
+        self.prefix = prefix
+        self.required = required
+
+    def get_num_states(self):
+        return self.num_states
+
+    def step(self, mask, col):  # Siguiente conjunto de estados activos: el OR de las máscaras de cada estado activo.
+        paso = self.pasos[col]
+        result = 0
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            result |= paso[low.bit_length() - 1]
+        return result
+
+    def fullmatch(self, cadena):    # Devuelve verdadero si el NFA acepta la cadena completa.
+        columnas = self.columnas
+        step = self.step
+        mask = self.start_mask
+        for c in cadena:
+            col = columnas.get(c)
+            if col is None:
+                return False
+            mask = step(mask, col)
+            if not mask:
+                return False
+        return bool(mask & self.end_mask)
+
+    def match(self, cadena, pos=0):     # Devuelve el final del match más largo que empieza en pos, o None si ningún prefijo es aceptado.
+        columnas = self.columnas
+        step = self.step
+        end_mask = self.end_mask
+        mask = self.start_mask
+        fin = pos if mask & end_mask else None
+        for i in range(pos, len(cadena)):
+            col = columnas.get(cadena[i])
+            if col is None:
+                break
+            mask = step(mask, col)
+            if not mask:
+                break
+            if mask & end_mask:
+                fin = i + 1
+        return fin
+
+    def search(self, cadena, pos=0):    # Devuelve (inicio, fin) del primer match dentro de la cadena, o None si no hay ninguno.
+        pos = next(candidate_starts(cadena, pos, self.prefix, self.required), None)     # Ningún match empieza antes del primer candidato del prefiltro de literales.
+        if pos is None:
+            return None
+        columnas = self.columnas    # Primero una pasada sin ancla (volviendo a activar el inicio en cada posición) para encontrar dónde termina el primer match.
+        step = self.step
+        end_mask = self.end_mask
+        start_mask = self.start_mask
+        mask = start_mask
+        primer_fin = pos if mask & end_mask else None
+        i = pos
+        while primer_fin is None and i < len(cadena):
+            col = columnas.get(cadena[i])
+            mask = (step(mask, col) if col is not None else 0) | start_mask
+            i += 1
+            if mask & end_mask:
+                primer_fin = i
+        if primer_fin is None:
+            return None
+        for inicio in candidate_starts(cadena, pos, self.prefix, self.required):    # El match más a la izquierda empieza a más tardar donde termina el primero.
+            if inicio > primer_fin:
+                break
+            fin = self.match(cadena, inicio)
+            if fin is not None:
+                return (inicio, fin)
+        return None
+
+
+# ================================ Conjuntos de patrones ================================
+
+
+# Clase Pattern_Set, varios patrones compilados en un solo DFA. Cada estado sabe qué patrones acepta, así basta una pasada sobre la entrada para saber todos los patrones que coinciden.
+class Pattern_Set:
+
+    def __init__(self, patterns, compiled, matches):
+        self.patterns = patterns
+        self.compiled = compiled    # Compiled_DFA de la unión. Un estado es de aceptación si acepta algún patrón.
+        self.matches = matches      # matches[s] es la tupla de números de patrón que acepta el estado s.
+        self.unanchored = None  # Unanchored_DFA de la unión para search, se crea la primera vez que se necesita.
+
+    def get_compiled(self):
+        return self.compiled
+
+    def fullmatch(self, cadena):    # Devuelve la tupla de patrones que aceptan la cadena completa.
+        dfa = self.compiled
+        table = dfa.table
+        width = dfa.width
+        columnas = dfa.columnas
+        otro = width - 1
+        s = dfa.start
+        for c in cadena:
+            s = table[s * width + columnas.get(c, otro)]
+            if not s:
+                return ()
+        return self.matches[s]
+
+    def search(self, cadena):   # Devuelve la tupla ordenada de patrones que tienen algún match dentro de la cadena.
+        if self.unanchored is None:     # Un estado sin ancla acepta los patrones de todos los estados que lo forman.
+            self.unanchored = Unanchored_DFA(self.compiled, matches=self.matches)
+        dfa = self.unanchored
+        filas = dfa.filas
+        compute = dfa.compute
+        etiquetas = dfa.etiquetas
+        columnas = self.compiled.columnas
+        otro = dfa.width - 1
+        s = dfa.start
+        encontrados = set(etiquetas[s])
+        for c in cadena:
+            col = columnas.get(c, otro)
+            t = filas[s][col]
+            s = t if t >= 0 else compute(s, col)
+            if etiquetas[s]:
+                encontrados.update(etiquetas[s])
+        return tuple(sorted(encontrados))
+
+def compile_set(patterns, alphabet, max_states=None, processes=None):  # Compila una lista de patrones en un Pattern_Set. Con processes, los NFA de cada patrón se construyen en paralelo en ese número de procesos.
+    alfabeto = list(alphabet)
+    patterns = list(patterns)
+    clases = Symbol_Classes([tokenize(p, alfabeto) for p in patterns], alfabeto)   # Las clases se calculan con todos los patrones, porque comparten la tabla.
+    if processes and len(patterns) > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            nfas = list(pool.map(regex_to_nfa, patterns, [alfabeto] * len(patterns), [clases] * len(patterns)))
+    else:
+        nfas = [regex_to_nfa(p, alfabeto, clases) for p in patterns]
+    representantes = clases.get_representantes()
+
+    union, finales = build_union_automata(nfas, Node_Counter())
+    engine, masks, transiciones = build_subsets(union, representantes, max_states)
+
+    patron = {}     # Patrón al que pertenece el bit de cada nodo final.
+    finales_mask = 0
+    for p in range(0, len(finales)):
+        for v in finales[p]:
+            patron[engine.numeros[v]] = p
+            finales_mask |= 1 << engine.numeros[v]
+
+    n = len(masks)
+    etiquetas = []  # Tupla de patrones que acepta cada estado del DFA, que es la etiqueta para minimizar.
+    for mask in masks:
+        ids = set()
+        mask &= finales_mask
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            ids.add(patron[low.bit_length() - 1])
+        etiquetas.append(tuple(sorted(ids)))
+    completa = []   # Tabla completa con un sumidero en n, como en minimize_dfa.
+    for fila in transiciones:
+        completa.append([t if t >= 0 else n for t in fila])
+    completa.append([n] * len(representantes))
+    etiquetas.append(())
+
+    bloque, num_bloques = hopcroft(completa, etiquetas)
+
+    numeros = {bloque[n]: 0}    # El bloque del sumidero es el estado muerto.
+    representante = [n]
+    if bloque[0] not in numeros:    # Si el inicio no es muerto, es el estado 1.
+        numeros[bloque[0]] = 1
+        representante.append(0)
+    actual = 1
+    while actual < len(representante):  # Numeramos los bloques en el orden en que se alcanzan desde el inicio.
+        for t in completa[representante[actual]]:
+            if bloque[t] not in numeros:
+                numeros[bloque[t]] = len(representante)
+                representante.append(t)
+        actual += 1
+
+    width = len(representantes) + 1
+    table = array("i", bytes(4 * len(representante) * width))
+    accepting = bytearray(len(representante))
+    matches = [()]
+    for s in range(1, len(representante)):
+        fila = completa[representante[s]]
+        for j in range(0, len(representantes)):
+            table[s * width + j] = numeros[bloque[fila[j]]]
+        matches.append(etiquetas[representante[s]])
+        accepting[s] = 1 if matches[s] else 0
+    names = [""] + [nombre_estado(s) for s in range(0, len(representante) - 1)]
+    start = 1 if len(representante) > 1 else 0
+    return Pattern_Set(patterns, Compiled_DFA(representantes, table, start, bytes(accepting), names, clases.get_columnas()), matches)
+
+
+# ================================ Estadísticas ================================
+
+
+# Clase Compile_Stats, lo que se midió al construir un autómata: tiempo de cada etapa, tamaño del NFA y del DFA, uso de los caches del Closure_Engine y, si se pide, el pico de memoria (tracemalloc) y el perfil (cProfile).
+class Compile_Stats:
+
+    def __init__(self, regex, memory=False, profile=False):     # memory y profile activan tracemalloc y cProfile mientras se construye, que hacen la construcción bastante más lenta.
+        self.regex = regex
+        self.memory = memory
+        self.profile = profile
+        self.stages = {}    # Segundos de cada etapa, en el orden en que se corrieron.
+        self.engine = None
+        self.nfa_vertices = 0
+        self.nfa_edges = 0
+        self.node_count = 0     # Nombres que repartió el Node_Counter del NFA.
+        self.closure = {}       # Contadores del Closure_Engine del NFA (ver Closure_Engine.get_stats).
+        self.dfa_states = None  # Estados que descubrió la construcción de subconjuntos, None si no se construyó el DFA.
+        self.minimized_states = None
+        self.peak_memory = None     # Pico de memoria en bytes, solo con memory=True.
+        self.profiler = None        # cProfile.Profile, solo con profile=True.
+        self.tracing = False        # Si tracemalloc ya estaba activo antes de empezar (entonces no se detiene al terminar).
+        self.marca = time.perf_counter()
+
+    def start(self):
+        if self.memory:
+            self.tracing = tracemalloc.is_tracing()
+            if not self.tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if self.profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.marca = time.perf_counter()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if not self.tracing:
+                tracemalloc.stop()
+
+    def lap(self, etapa):   # Suma a etapa el tiempo desde la marca anterior y pone la marca en el momento actual.
+        ahora = time.perf_counter()
+        self.stages[etapa] = self.stages.get(etapa, 0.0) + ahora - self.marca
+        self.marca = ahora
+
+    def record_nfa(self, nfa, counter):
+        self.nfa_vertices = len(nfa.graph_dict)
+        self.nfa_edges = sum(len(conexiones) for conexiones in nfa.graph_dict.values())
+        self.node_count = counter.get_count()
+
+    def record_positions(self, posiciones):     # Tamaño del NFA de posiciones de Glushkov (una posición por símbolo de la expresión más el inicio), aunque no se construya como grafo.
+        self.nfa_vertices = posiciones.get_num_positions() + 1
+        self.nfa_edges = posiciones.get_num_edges()
+        self.node_count = self.nfa_vertices
+
+    def record_automaton(self, automaton):
+        self.engine = automaton.get_engine()
+        nfa = automaton.get_nfa()
+        if nfa is not None and nfa.closure_engine is not None:
+            self.closure = nfa.closure_engine.get_stats()
+        if automaton.get_dfa() is not None:
+            self.dfa_states = len(automaton.get_dfa().graph_dict)
+        if automaton.get_minimized_dfa() is not None:
+            self.minimized_states = len(automaton.get_minimized_dfa().graph_dict)
+
+    def get_stages(self):
+        return self.stages
+
+    def get_total_time(self):
+        return sum(self.stages.values())
+
+    def get_hit_rate(self, cache="closure"):    # Fracción de las consultas al cache "closure" o "move" que ya estaban calculadas, o None si no hubo consultas.
+        calls = self.closure.get(cache + "_calls", 0)
+        if not calls:
+            return None
+        return self.closure[cache + "_hits"] / calls
+
+    def get_peak_memory(self):
+        return self.peak_memory
+
+    def get_profile(self, limit=20):    # Texto con las limit funciones de más tiempo acumulado, o None si no se perfiló.
+        if self.profiler is None:
+            return None
+        salida = io.StringIO()
+        pstats.Stats(self.profiler, stream=salida).sort_stats("cumulative").print_stats(limit)
+        return salida.getvalue()
+
+    def to_dict(self):  # Las mediciones como diccionario, listo para json.dumps.
+        return {
+            "regex": self.regex,
+            "engine": self.engine,
+            "stages": dict(self.stages),
+            "total_time": self.get_total_time(),
+            "nfa_vertices": self.nfa_vertices,
+            "nfa_edges": self.nfa_edges,
+            "node_count": self.node_count,
+            "closure": dict(self.closure),
+            "closure_hit_rate": self.get_hit_rate("closure"),
+            "move_hit_rate": self.get_hit_rate("move"),
+            "dfa_states": self.dfa_states,
+            "minimized_states": self.minimized_states,
+            "peak_memory": self.peak_memory,
+        }
+
+    def __str__(self):
+        lineas = [f"Compile stats for {self.regex!r} (engine {self.engine}):"]
+        for etapa, segundos in self.stages.items():
+            lineas.append(f"  {etapa}: {segundos * 1000:.3f} ms")
+        lineas.append(f"  NFA: {self.nfa_vertices} vertices, {self.nfa_edges} edges")
+        for cache in ("closure", "move"):
+            rate = self.get_hit_rate(cache)
+            if rate is not None:
+                lineas.append(f"  {cache} cache: {self.closure[cache + '_calls']} lookups, {rate:.1%} hits")
+        if self.dfa_states is not None:
+            lineas.append(f"  DFA states: {self.dfa_states}" + (f" ({self.minimized_states} minimized)" if self.minimized_states is not None else ""))
+        if self.peak_memory is not None:
+            lineas.append(f"  Peak memory: {self.peak_memory} bytes")
+        return "\n".join(lineas)
+
+STATS_HOOKS = []    # Funciones que se llaman con el Compile_Stats de cada autómata que se construye (las llamadas a compile() que salen del cache no construyen nada).
+
+def add_stats_hook(hook):
+    STATS_HOOKS.append(hook)
+
+def remove_stats_hook(hook):
+    STATS_HOOKS.remove(hook)
+
+def profile_compile(regex, alphabet, memory=True, profile=True, **opciones):   # Construye el autómata sin pasar por el cache con tracemalloc y/o cProfile activos; el pico de memoria y el perfil quedan en automaton.get_stats(). opciones son las de build_automaton (max_states, minimize, engine, expected_input, construction).
+    return build_automaton(regex, alphabet, stats=Compile_Stats(regex, memory, profile), **opciones)
+
+
+# ================================ API ================================
+
+
+# Clase Automaton, resultado de compilar una expresión. Guarda el NFA, el DFA y la tabla compilada, y se puede reutilizar para correr tantas cadenas como se quiera.
+class Automaton:
+
+    def __init__(self, regex, alfabeto, nfa, dfa, compiled, minimized=None, engine="dfa"):
+        self.regex = regex
+        self.alfabeto = alfabeto
+        self.nfa = nfa
+        self.dfa = dfa
+        self.minimized = minimized  # DFA mínimo, o None si se compiló sin minimizar.
+        self.compiled = compiled    # Compiled_DFA, Lazy_DFA o NFA_Simulator, según el motor.
+        self.engine = engine        # Motor con el que se corren las cadenas: "dfa", "lazy" o "nfa".
+        self.stats = None           # Compile_Stats de la construcción (None si se cargó de un archivo).
+
+    def get_nfa(self):
+        return self.nfa
+
+    def get_dfa(self):
+        return self.dfa
+
+    def get_minimized_dfa(self):
+        return self.minimized
+
+    def get_compiled(self):
+        return self.compiled
+
+    def get_engine(self):
+        return self.engine
+
+    def get_stats(self):
+        return self.stats
+
+    def get_literals(self):     # Devuelve (prefijo, requerido), los literales que usa search para saltar a las posiciones candidatas.
+        return self.compiled.prefix, self.compiled.required
+
+    def get_state_counts(self):     # Devuelve el número de estados del DFA antes y después de minimizar.
+        if self.dfa is None:    # Sin DFA completo se devuelven los estados que usa el motor (los del cache en modo perezoso, los del NFA en simulación).
+            return self.compiled.get_num_states(), self.compiled.get_num_states()
+        if self.minimized is None:
+            return len(self.dfa.graph_dict), len(self.dfa.graph_dict)
+        return len(self.dfa.graph_dict), len(self.minimized.graph_dict)
+
+    def fullmatch(self, cadena):
+        return self.compiled.fullmatch(cadena)
+
+    def match(self, cadena, pos=0):
+        return self.compiled.match(cadena, pos)
+
+    def search(self, cadena, pos=0):
+        return self.compiled.search(cadena, pos)
+
+    def require_dfa(self, operacion):   # Lanza ValueError si el motor no es el DFA compilado, que es el único que tiene la tabla completa.
+        if not isinstance(self.compiled, Compiled_DFA):
+            raise ValueError(f"{operacion} needs the dfa engine, this automaton uses the {self.engine} engine")
+
+    def encode_batch(self, cadenas):
+        self.require_dfa("encode_batch")
+        return self.compiled.encode_batch(cadenas)
+
+    def fullmatch_batch(self, cadenas):
+        self.require_dfa("fullmatch_batch")
+        return self.compiled.fullmatch_batch(cadenas)
+
+    def iter_lines(self, source, search=False, chunk_size=65536):
+        self.require_dfa("iter_lines")
+        return self.compiled.iter_lines(source, search, chunk_size)
+
+    def iter_match_ends(self, source, chunk_size=65536):
+        self.require_dfa("iter_match_ends")
+        return self.compiled.iter_match_ends(source, chunk_size)
+
+    def save(self, path, include_nfa=True):
+        save_automaton(self, path, include_nfa)
+
+    def export(self, destino, format="text", which="dfa"):  # Escribe el autómata which ("nfa", "dfa" o "minimized") con export_graph.
+        graphs = {"nfa": self.nfa, "dfa": self.dfa, "minimized": self.minimized}
+        if graphs.get(which) is None:
+            raise ValueError(f"Automaton has no {which} graph")
+        export_graph(graphs[which], destino, format)
+
+COMPILE_CACHE_SIZE = 512    # Cantidad máxima de autómatas que se guardan en el cache de compile().
+
+LAZY_CACHE_STATES = 10000   # Tamaño por defecto del cache de estados del modo perezoso.
+
+AUTO_DFA_STATES = 2000      # En modo "auto", si el DFA completo pasa de este número de estados se usa el DFA perezoso.
+
+ENGINES = ("auto", "dfa", "lazy", "nfa")
+
+CONSTRUCTIONS = ("thompson", "glushkov")    # Thompson: NFA con transiciones épsilon y construcción de subconjuntos. Glushkov: DFA directo de las posiciones de la expresión, sin épsilon.
+
+def choose_engine(num_states, alfabeto, expected_input=None):   # Primera elección del modo "auto": si se espera menos entrada que el número de estados del NFA por el tamaño del alfabeto, no vale la pena construir ningún DFA y se simula el NFA.
+    if expected_input is not None and expected_input <= num_states * len(alfabeto):
+        return "nfa"
+    return "dfa"
+
+def run_pipeline(regex, alfabeto, max_states, minimize, engine, expected_input, construction, stats):  # Las etapas de build_automaton, registrando en stats el tiempo de cada una.
+    tokens = tokenize(regex, alfabeto)
+    clases = Symbol_Classes([tokens], alfabeto)     # Todo el autómata trabaja sobre las clases de símbolos, no sobre el alfabeto completo.
+    representantes = clases.get_representantes()
+    columnas = clases.get_columnas()
+    arbol = to_ast(insert_concatenation(tokens))
+    prefijo, requerido = required_literals(arbol)
+    stats.lap("parse")
+    if construction == "glushkov":  # El NFA de posiciones solo se construye como grafo si algún motor lo necesita.
+        nfa = None
+        posiciones = Glushkov_Positions(arbol, clases)
+        stats.lap("positions")
+        stats.record_positions(posiciones)
+    else:
+        counter = Node_Counter()
+        nfa = ast_to_nfa(arbol, clases, counter)
+        stats.lap("thompson")
+        stats.record_nfa(nfa, counter)
+
+    auto = engine == "auto"
+    if auto:    # Primero se decide por volumen de entrada, y luego intentando el DFA completo con un límite de estados: si explota, perezoso.
+        engine = choose_engine(stats.nfa_vertices, representantes, expected_input)
+    if engine == "dfa":
+        limite = (max_states or AUTO_DFA_STATES) if auto else max_states
+        try:
+            if nfa is None:
+                dfa = glushkov_dfa(posiciones, representantes, limite)
+            else:
+                dfa = get_cerraduras(nfa, representantes, limite)
+        except State_Limit_Error:
+            if not auto:
+                raise
+            engine = "lazy"
+            max_states = None
+        stats.lap("subset")
+
+    if engine != "dfa" and nfa is None:
+        nfa = posiciones.to_nfa(representantes)
+        stats.lap("glushkov_nfa")
+
+    if engine == "lazy":    # En modo perezoso no se construye el DFA y max_states es el tamaño del cache de estados.
+        automaton = Automaton(regex, alfabeto, nfa, None, Lazy_DFA(nfa, representantes, max_states or LAZY_CACHE_STATES, columnas=columnas), engine="lazy")
+        automaton.get_compiled().set_literals(prefijo, requerido)
+        stats.lap("lazy")
+        return automaton
+    if engine == "nfa":
+        automaton = Automaton(regex, alfabeto, nfa, None, NFA_Simulator(nfa, representantes, columnas), engine="nfa")
+        automaton.get_compiled().set_literals(prefijo, requerido)
+        stats.lap("simulator")
+        return automaton
+
+    minimized = None
+    if minimize:
+        minimized = minimize_dfa(dfa, representantes)
+        stats.lap("minimize")
+    automaton = Automaton(regex, alfabeto, nfa, dfa, compile_dfa(minimized or dfa, representantes, columnas), minimized)
+    automaton.get_compiled().set_literals(prefijo, requerido)
+    stats.lap("compile")
+    return automaton
+
+def build_automaton(regex, alfabeto, max_states=None, minimize=True, engine="dfa", expected_input=None, construction="thompson", stats=None):  # Hace todo el proceso RegEx -> NFA -> DFA -> DFA mínimo -> tabla sin pasar por el cache. Con construction="glushkov" el DFA se construye directo de la expresión (el Automaton no guarda NFA si el motor es "dfa"). Las mediciones quedan en el Compile_Stats stats (se crea uno si no se da), que se guarda en automaton.get_stats() y se pasa a cada función de STATS_HOOKS.
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}")
+    if construction not in CONSTRUCTIONS:
+        raise ValueError(f"Unknown construction {construction}")
+    if stats is None:
+        stats = Compile_Stats(regex)
+    stats.start()
+    try:
+        automaton = run_pipeline(regex, list(alfabeto), max_states, minimize, engine, expected_input, construction, stats)
+    finally:    # El profiler y tracemalloc se detienen aunque la construcción falle (Ej. State_Limit_Error).
+        stats.stop()
+    stats.record_automaton(automaton)
+    automaton.stats = stats
+    for hook in STATS_HOOKS:
+        hook(stats)
+    return automaton
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_cached(regex, alfabeto, max_states, minimize, engine, expected_input, construction):  # El cache usa como llave la expresión y el alfabeto como string.
+    return build_automaton(regex, alfabeto, max_states, minimize, engine, expected_input, construction)
+
+def compile(regex, alphabet, max_states=None, minimize=True, engine="dfa", expected_input=None, construction="thompson"):  # Punto de entrada de la librería. Devuelve el Automaton de la expresión, reutilizando el del cache si ya se había compilado. engine puede ser "dfa", "lazy", "nfa" o "auto" (elegido según el tamaño del DFA y expected_input, el número de caracteres que se espera correr); Automaton.get_engine() dice cuál se usó. Solo el motor "dfa" tiene encode_batch, fullmatch_batch, iter_lines, iter_match_ends y save. construction es "thompson" o "glushkov" (ver CONSTRUCTIONS).
+    return _compile_cached(regex, "".join(alphabet), max_states, minimize, engine, expected_input, construction)
+
+def compile_cache_info():   # Devuelve los aciertos (hits), fallos (misses) y tamaño del cache de compile().
+    return _compile_cached.cache_info()
+
+def clear_compile_cache():
+    _compile_cached.cache_clear()
+
+
+# ================================ Serialización ================================
+
+
+FORMAT_MAGIC = b"RDFA"  # Formato binario de un autómata compilado: encabezado, alfabeto, regex, tabla de transiciones, mapa de aceptación, columna de cada símbolo y, opcionalmente, el NFA.
+FORMAT_VERSION = 1
+FORMAT_HEADER = struct.Struct("<4sHHIIIIIII")   # magic, versión, flags, estados, width, inicio, bytes del alfabeto, bytes de la regex, bytes del NFA, checksum (crc32 del encabezado con el checksum en 0 y de todo lo que sigue).
+FLAG_NFA = 1
+SIN_SIMBOLO = 0xFFFFFFFF    # Índice de símbolo con el que se guardan las transiciones épsilon del NFA.
+
+def align(n):   # Redondea n al siguiente múltiplo de 4, para que la tabla quede alineada dentro del archivo.
+    return (n + 3) & ~3
+
+def format_checksum(header, cuerpo):    # crc32 del encabezado (sin importar lo que tenga en el lugar del checksum, que es el último campo) seguido del cuerpo.
+    return zlib.crc32(cuerpo, zlib.crc32(bytes(4), zlib.crc32(header[:FORMAT_HEADER.size - 4])))
+
+def dump_automaton(compiled, nfa=None, regex=""):   # Devuelve los bytes del formato binario para un Compiled_DFA (y su NFA si se da).
+    simbolos = list(compiled.columnas)  # Se guarda el alfabeto completo; el símbolo de cada columna se saca de aquí al cargar.
+    alfabeto = "".join(simbolos).encode("utf-8")
+    clases = array("I", [compiled.columnas[s] for s in simbolos])
+    regex = regex.encode("utf-8")
+    table = array("i", compiled.table)
+    if sys.byteorder != "little":   # El formato siempre guarda enteros little-endian.
+        table.byteswap()
+        clases.byteswap()
+
+    cuerpo = bytearray()
+    cuerpo += alfabeto
+    cuerpo += regex
+    cuerpo += bytes(align(len(cuerpo)) - len(cuerpo))
+    cuerpo += table.tobytes()
+    cuerpo += bytes(compiled.accepting)
+    cuerpo += bytes(align(len(cuerpo)) - len(cuerpo))
+    cuerpo += clases.tobytes()
+
+    nfa_bytes = b""
+    if nfa is not None:     # NFA como lista de enteros: número de estados, inicio, finales, y ternas (origen, destino, símbolo) de cada transición.
+        numeros = {}
+        for v in nfa.graph_dict:
+            numeros[v] = len(numeros)
+        columnas = compiled.columnas    # Las transiciones del NFA son representantes, así que su columna es su índice de símbolo.
+        datos = array("I", [len(numeros)])
+        inicio = [numeros[v] for v in nfa.graph_dict if v.get_begin()]
+        finales = [numeros[v] for v in nfa.graph_dict if v.get_end()]
+        datos.append(len(inicio))
+        datos.extend(inicio)
+        datos.append(len(finales))
+        datos.extend(finales)
+        for v in nfa.graph_dict:
+            for v2 in nfa.graph_dict[v]:
+                datos.extend((numeros[v], numeros[v2[0]], columnas.get(v2[1].get_character(), SIN_SIMBOLO)))
+        if sys.byteorder != "little":
+            datos.byteswap()
+        nfa_bytes = datos.tobytes()
+    cuerpo += nfa_bytes
+
+    campos = (FORMAT_MAGIC, FORMAT_VERSION, FLAG_NFA if nfa is not None else 0, compiled.get_num_states(), compiled.width, compiled.start, len(alfabeto), len(regex), len(nfa_bytes))
+    header = FORMAT_HEADER.pack(*campos, format_checksum(FORMAT_HEADER.pack(*campos, 0), cuerpo))
+    return header + bytes(cuerpo)
+
+def save_automaton(automaton, path, include_nfa=True):  # Guarda un Automaton con motor "dfa" en un archivo.
+    automaton.require_dfa("save")
+    with open(path, "wb") as archivo:
+        archivo.write(dump_automaton(automaton.compiled, automaton.nfa if include_nfa else None, automaton.regex))
+
+def load_automaton(source, verify=True):    # Carga un Automaton desde la ruta de un archivo o desde bytes. Los archivos se abren con mmap y la tabla se usa directo desde el mapa, así varios procesos comparten una sola copia en memoria.
+    if isinstance(source, str):
+        with open(source, "rb") as archivo:
+            datos = memoryview(mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ))
+    else:
+        datos = memoryview(source)
+
+    if len(datos) < FORMAT_HEADER.size:
+        raise ValueError("Truncated automaton file")
+    magic, version, flags, num_states, width, start, len_alfabeto, len_regex, len_nfa, checksum = FORMAT_HEADER.unpack_from(datos)
+    if magic != FORMAT_MAGIC:
+        raise ValueError("Not an automaton file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported automaton format version {version}")
+    cuerpo = datos[FORMAT_HEADER.size:]
+    if verify and format_checksum(datos[:FORMAT_HEADER.size], cuerpo) != checksum:
+        raise ValueError("Automaton file checksum mismatch")
+    if num_states == 0 or width == 0 or start >= num_states:
+        raise ValueError("Corrupt automaton file")
+
+    pos = 0
+    alfabeto = list(str(cuerpo[pos:pos + len_alfabeto], "utf-8"))
+    pos += len_alfabeto
+    regex = str(cuerpo[pos:pos + len_regex], "utf-8")
+    pos = align(pos + len_regex)
+    len_clases = 4 * len(alfabeto)
+    if len(cuerpo) < align(pos + num_states * width * 4 + num_states) + len_clases + len_nfa:
+        raise ValueError("Corrupt automaton file")
+
+    table = cuerpo[pos:pos + num_states * width * 4]
+    if sys.byteorder == "little":   # Sin copiar: la tabla es una vista de enteros sobre el mapa.
+        table = table.cast("i")
+    else:
+        table = array("i", table.tobytes())
+        table.byteswap()
+    if verify and (min(table) < 0 or max(table) >= num_states):    # Todo destino tiene que ser un estado de la tabla.
+        raise ValueError("Corrupt automaton file")
+    pos += num_states * width * 4
+    accepting = cuerpo[pos:pos + num_states]
+    pos = align(pos + num_states)
+
+    clases = array("I")
+    clases.frombytes(cuerpo[pos:pos + len_clases])
+    if sys.byteorder != "little":
+        clases.byteswap()
+    pos += len_clases
+    columnas = {}
+    representantes = [None] * (width - 1)
+    for i in range(0, len(alfabeto)):
+        if clases[i] >= width - 1:
+            raise ValueError("Corrupt automaton file")
+        columnas[alfabeto[i]] = clases[i]
+        if representantes[clases[i]] is None:
+            representantes[clases[i]] = alfabeto[i]
+    names = [""] + [nombre_estado(s) for s in range(0, num_states - 1)]
+    compiled = Compiled_DFA(representantes, table, start, accepting, names, columnas)
+
+    nfa = None
+    if flags & FLAG_NFA:
+        enteros = array("I")
+        enteros.frombytes(cuerpo[pos:pos + len_nfa])
+        if sys.byteorder != "little":
+            enteros.byteswap()
+        nfa = Directed_Graph()
+        nfa.set_miembros(class_members(representantes, compiled.columnas))
+        vertices = [Vertex(str(i)) for i in range(0, enteros[0])]
+        for v in vertices:
+            nfa.add_vertex(v)
+        i = 1
+        for k in enteros[i + 1:i + 1 + enteros[i]]:
+            vertices[k].set_begin(True)
+        i += 1 + enteros[i]
+        for k in enteros[i + 1:i + 1 + enteros[i]]:
+            vertices[k].set_end(True)
+        i += 1 + enteros[i]
+        while i < len(enteros):
+            character = EPSILON if enteros[i + 2] == SIN_SIMBOLO else representantes[enteros[i + 2]]
+            nfa.add_edge(Edge(vertices[enteros[i]], vertices[enteros[i + 1]], Transition(character)))
+            i += 3
+
+    if regex:   # Los literales del prefiltro no se guardan en el archivo, se vuelven a sacar de la expresión.
+        compiled.set_literals(*required_literals(to_ast(insert_concatenation(tokenize(regex, alfabeto)))))
+    return Automaton(regex, alfabeto, nfa, None, compiled)
+
+
+# ================================ Exportación ================================
+
+
+# Generadores que devuelven un autómata (Directed_Graph) por partes en distintos formatos. Cada parte es a lo más un estado con sus conexiones, así se puede escribir un autómata de cualquier tamaño a un archivo sin tenerlo completo en memoria.
+
+def iter_text(graph):   # Formato de texto de print(Graph): un renglón por estado con sus conexiones y al final la lista de estados de aceptación. Una transición con un representante de clase sale una vez por cada símbolo de la clase.
+    miembros = graph.get_miembros
+    for v1 in graph.graph_dict:
+        linea = v1.get_name() + " => [" + ", ".join("(" + v2.get_name() + ", '" + simbolo + "')" for v2, trans in graph.graph_dict[v1] for simbolo in miembros(trans.get_character())) + "]"
+        if v1.get_begin():
+            linea += " Start"
+        yield linea + "\n"
+    yield "Accepting states: ["
+    first = True
+    for v in graph.graph_dict:  # Segunda pasada en lugar de guardar la lista de estados de aceptación.
+        if v.get_end():
+            yield ("'" if first else ",'") + v.get_name() + "'"
+            first = False
+    yield "]"
+
+def dot_id(texto):  # Identificador entre comillas para Graphviz.
+    return '"' + texto.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def dot_label(graph, character):    # Etiqueta de una transición en DOT: ε para épsilon, o los símbolos de su clase separados por comas.
+    if character == EPSILON:
+        return dot_id("ε")
+    return dot_id(",".join(graph.get_miembros(character)))
+
+def iter_dot(graph, name="automaton"):  # Formato DOT de Graphviz (dot -Tsvg). Los estados de aceptación van con doble círculo y las transiciones épsilon se muestran como ε.
+    yield "digraph " + dot_id(name) + " {\n  rankdir=LR;\n  node [shape=circle];\n"
+    for v in graph.graph_dict:
+        if v.get_end():
+            yield "  " + dot_id(v.get_name()) + " [shape=doublecircle];\n"
+        if v.get_begin():   # Flecha de entrada al estado inicial desde un punto invisible.
+            yield "  " + dot_id("__start_" + v.get_name()) + " [shape=point, style=invis];\n  " + dot_id("__start_" + v.get_name()) + " -> " + dot_id(v.get_name()) + ";\n"
+    for v1 in graph.graph_dict:
+        origen = "  " + dot_id(v1.get_name()) + " -> "
+        yield "".join(origen + dot_id(v2.get_name()) + " [label=" + dot_label(graph, trans.get_character()) + "];\n" for v2, trans in graph.graph_dict[v1])
+    yield "}\n"
+
+def iter_json(graph):   # Formato JSON: {"states": [{"name", "start", "accepting"}, ...], "edges": [[origen, destino, caracter], ...]}, con una conexión por cada símbolo de la clase de cada transición.
+    yield '{"states": ['
+    separador = ""
+    for v in graph.graph_dict:
+        yield separador + '{"name": ' + json.dumps(v.get_name()) + ', "start": ' + ("true" if v.get_begin() else "false") + ', "accepting": ' + ("true" if v.get_end() else "false") + "}"
+        separador = ", "
+    yield '], "edges": ['
+    separador = ""
+    caracteres = {}     # json.dumps de cada caracter de transición, que son pocos y se repiten en muchas conexiones.
+    for v1 in graph.graph_dict:
+        conexiones = graph.graph_dict[v1]
+        if not conexiones:
+            continue
+        origen = "[" + json.dumps(v1.get_name()) + ", "
+        for v2, trans in conexiones:
+            if trans.get_character() not in caracteres:
+                caracteres[trans.get_character()] = [json.dumps(simbolo) for simbolo in graph.get_miembros(trans.get_character())]
+        yield separador + ", ".join(origen + json.dumps(v2.get_name()) + ", " + simbolo + "]" for v2, trans in conexiones for simbolo in caracteres[trans.get_character()])
+        separador = ", "
+    yield "]}\n"
+
+EXPORT_FORMATS = {"text": iter_text, "dot": iter_dot, "json": iter_json}
+
+def export_graph(graph, destino, format="text"):    # Escribe el autómata en destino (ruta de un archivo o un stream de texto abierto, Ej. sys.stdout) en el formato "text", "dot" o "json", parte por parte.
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {format}")
+    if isinstance(destino, str):
+        with open(destino, "w", encoding="utf-8") as archivo:
+            export_graph(graph, archivo, format)
+        return
+    write = destino.write
+    for parte in EXPORT_FORMATS[format](graph):
+        write(parte)
+
+
+# ================================ Compilación por lotes ================================
+
+
+BATCH_WINDOW = 4    # Pares pendientes por proceso en compile_batch.
+
+BATCH_RECENT = 256  # Resultados ya devueltos que compile_batch guarda para reutilizarlos si el par se repite más adelante.
+
+BATCH_OUTPUTS = ("table", "blob", "none")   # Qué lleva cada resultado: la tabla del DFA en JSON, el archivo binario de save_automaton en base64, o solo las estadísticas.
+
+def read_pairs(lineas):     # Generador de pares (alfabeto, regex), uno por línea: JSON {"alphabet": ..., "regex": ...}, JSON ["alfabeto", "regex"] o alfabeto<TAB>regex. Las líneas vacías se ignoran; una línea que no se entiende da (None, línea) y su resultado es un error.
+    for linea in lineas:
+        linea = linea.rstrip("\r\n")
+        if not linea.strip():
+            continue
+        try:
+            if linea.lstrip().startswith(("{", "[")):
+                par = json.loads(linea)
+                if isinstance(par, dict):
+                    par = (par["alphabet"], par["regex"])
+                alfabeto, regex = par
+            else:
+                alfabeto, regex = linea.split("\t", 1)
+        except (ValueError, KeyError, TypeError):
+            yield (None, linea)
+            continue
+        yield (str(alfabeto), str(regex))
+
+def raise_timeout(signum, frame):
+    raise TimeoutError("compile timed out")
+
+def compile_task(alfabeto, regex, max_states=None, minimize=True, construction="thompson", timeout=None, output="table"):  # Compila un par y devuelve su resultado como diccionario listo para json.dumps. Nunca lanza: cualquier error (expresión inválida, State_Limit_Error, tiempo agotado) queda en el resultado con "ok": False.
+    resultado = {"alphabet": alfabeto, "regex": regex}
+    alarma = False      # Si se puso nuestro manejador de SIGALRM.
+    manejador = None    # Manejador de SIGALRM que había antes, se restaura al terminar.
+    timer = (0.0, 0.0)  # Timer que tenía el proceso antes (segundos restantes, intervalo), se vuelve a armar al terminar.
+    inicio = time.perf_counter()
+    try:
+        if alfabeto is None:
+            raise ValueError("malformed input line")
+        if timeout and hasattr(signal, "setitimer"):    # El límite de tiempo usa SIGALRM, así interrumpe la construcción aunque esté en un ciclo largo. Solo funciona en el hilo principal y en sistemas con setitimer.
+            try:
+                manejador = signal.signal(signal.SIGALRM, raise_timeout)
+            except ValueError:
+                pass
+            else:
+                alarma = True
+                timer = signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            automaton = build_automaton(regex, alfabeto, max_states, minimize, "dfa", construction=construction)
+        finally:
+            if alarma:  # Se desarma antes que nada: una alarma que llegue ahora todavía cae en el except de abajo.
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        compiled = automaton.get_compiled()
+        resultado["ok"] = True
+        resultado["states"] = compiled.get_num_states()
+        if output == "table":
+            resultado["width"] = compiled.width
+            resultado["start"] = compiled.start
+            resultado["accepting"] = [s for s in range(0, compiled.get_num_states()) if compiled.accepting[s]]
+            resultado["columns"] = compiled.columnas
+            resultado["table"] = compiled.table.tolist()
+        elif output == "blob":
+            resultado["blob"] = base64.b64encode(dump_automaton(compiled, None, regex)).decode("ascii")
+        resultado["stats"] = automaton.get_stats().to_dict()
+    except Exception as error:  # Un patrón que falla no detiene el lote.
+        resultado = task_error((alfabeto, regex), error)
+    finally:
+        if alarma:  # Deja SIGALRM como estaba; el timer de quien llamó sigue contando desde donde iba.
+            signal.signal(signal.SIGALRM, manejador if manejador is not None else signal.SIG_DFL)   # None es un manejador que no se puso desde Python.
+            if timer[0] > 0:
+                signal.setitimer(signal.ITIMER_REAL, max(timer[0] - (time.perf_counter() - inicio), 1e-6), timer[1])
+    return resultado
+
+def task_error(par, error):     # Resultado de un par cuya compilación falló con error.
+    return {"alphabet": par[0], "regex": par[1], "ok": False, "error": f"{type(error).__name__}: {error}"}
+
+def compile_batch(pares, processes=None, timeout=None, max_states=None, minimize=True, construction="thompson", output="table"):  # Generador que compila pares (alfabeto, regex) y devuelve el resultado de cada uno (ver compile_task) en el orden de entrada, con su índice en "index". Un par repetido se compila una sola vez mientras su resultado siga pendiente o esté entre los últimos BATCH_RECENT resultados. Con processes > 1 se compilan en ese número de procesos, con a lo más BATCH_WINDOW pendientes por proceso; así la memoria depende de processes y de BATCH_RECENT, no del tamaño del lote.
+    if output not in BATCH_OUTPUTS:
+        raise ValueError(f"Unknown batch output {output}")
+    opciones = (max_states, minimize, construction, timeout, output)
+    recientes = OrderedDict()   # Últimos resultados devueltos por par, del más viejo al más nuevo.
+
+    if not processes or processes == 1:
+        for index, par in enumerate(pares):
+            resultado = recientes.pop(par, None)
+            if resultado is None:
+                resultado = compile_task(par[0], par[1], *opciones)
+            remember_result(recientes, par, resultado)
+            yield dict(resultado, index=index)
+        return
+
+    pool = ProcessPoolExecutor(processes)
+    hechos = {}         # Resultado (o future) de cada par distinto que todavía tiene índices pendientes.
+    referencias = {}    # Número de índices pendientes de cada par de hechos.
+    pendientes = deque()    # (índice, par) en el orden de entrada, todavía sin devolver.
+    try:
+        for index, par in enumerate(pares):
+            if par not in hechos:
+                resultado = recientes.pop(par, None)
+                hechos[par] = resultado if resultado is not None else submit_task(pool, par, opciones)
+                referencias[par] = 0
+            referencias[par] += 1
+            pendientes.append((index, par))
+            while len(pendientes) > BATCH_WINDOW * processes:
+                resultado, pool = batch_result(hechos, referencias, recientes, pendientes.popleft(), pool, processes, opciones)
+                yield resultado
+        while pendientes:
+            resultado, pool = batch_result(hechos, referencias, recientes, pendientes.popleft(), pool, processes, opciones)
+            yield resultado
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def remember_result(recientes, par, resultado):     # Guarda el resultado de par como el más nuevo, olvidando el más viejo si ya hay BATCH_RECENT.
+    recientes[par] = resultado
+    if len(recientes) > BATCH_RECENT:
+        recientes.popitem(last=False)
+
+def submit_task(pool, par, opciones):   # Manda compile_task al pool. Si el pool ya está roto devuelve un future con el error, que batch_result se encarga de reintentar.
+    try:
+        return pool.submit(compile_task, par[0], par[1], *opciones)
+    except BrokenProcessPool as error:
+        futuro = Future()
+        futuro.set_exception(error)
+        return futuro
+
+def worker_died(par):   # Resultado de un par que mata al proceso que lo compila.
+    return {"alphabet": par[0], "regex": par[1], "ok": False, "error": "BrokenProcessPool: worker process died"}
+
+def isolated_results(pares, processes, opciones):   # Compila cada par en su propio pool de un solo proceso, processes a la vez, así un par que mata a su proceso no se lleva a los demás. Devuelve la lista de resultados.
+    resultados = []
+    for inicio in range(0, len(pares), processes):
+        grupo = []
+        for par in pares[inicio:inicio + processes]:
+            aislado = ProcessPoolExecutor(1)
+            grupo.append((par, aislado, submit_task(aislado, par, opciones)))
+        for par, aislado, futuro in grupo:
+            try:
+                resultados.append(futuro.result())
+            except BrokenProcessPool:
+                resultados.append(worker_died(par))
+            except Exception as error:
+                resultados.append(task_error(par, error))
+            aislado.shutdown(cancel_futures=True)
+    return resultados
+
+def batch_result(hechos, referencias, recientes, pendiente, pool, processes, opciones):    # Espera el resultado de un par de compile_batch y devuelve (resultado, pool). Si un proceso del pool muere (Ej. sin memoria), se crea un pool nuevo y cada par que se perdió se vuelve a compilar aislado en su propio proceso: solo el par que vuelve a matar a su proceso queda con error.
+    index, par = pendiente
+    while not isinstance(hechos[par], dict):
+        try:
+            hechos[par] = hechos[par].result()
+        except BrokenProcessPool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = ProcessPoolExecutor(processes)
+            sospechosos = [otro for otro, valor in hechos.items() if not isinstance(valor, dict) and valor.done() and isinstance(valor.exception(), BrokenProcessPool)]
+            for otro, resultado in zip(sospechosos, isolated_results(sospechosos, processes, opciones)):
+                hechos[otro] = resultado
+        except Exception as error:  # compile_task nunca lanza, pero el par puede fallar al mandarse o al volver del proceso (Ej. pickle), y eso no debe detener el lote.
+            hechos[par] = task_error(par, error)
+    resultado = hechos[par]
+    referencias[par] -= 1
+    if not referencias[par]:    # Ya no hay índices pendientes de este par: su resultado pasa a los recientes.
+        del hechos[par]
+        del referencias[par]
+        remember_result(recientes, par, resultado)
+    return dict(resultado, index=index), pool
+
+
+# ================================ Main ================================
+
+
+def main():
+    alfabetostr = input("Alphabet: ")   # Inputs del alfabeto y de la expresión.
+    expres = input("RegEx: ")
+
+    print("\n----RESULTS----\nINPUT:")
+    print(expres)
+
+    automaton = build_automaton(expres, alfabetostr)
+
+    print("\nNFA:")
+    print(automaton.get_nfa())
+
+    print("\nDFA:")
+    print(automaton.get_dfa())
+
+    antes, despues = automaton.get_state_counts()
+    print(f"\nMinimized DFA ({antes} -> {despues} states):")
+    print(automaton.get_minimized_dfa())
+
+def batch_main(argv=None):     # Línea de comandos para compilar muchos pares: python grafo.py pares.txt -j 8 > resultados.jsonl. Escribe un resultado JSON por línea, en el orden de entrada.
+    parser = argparse.ArgumentParser(description="Compile (alphabet, regex) pairs in batch and write one JSON result per line, in input order.")
+    parser.add_argument("input", nargs="?", default="-", help="file with one pair per line (JSON object, JSON array or alphabet<TAB>regex); - reads stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSON Lines output file; - writes to stdout")
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count(), help="worker processes (1 compiles in this process)")
+    parser.add_argument("--timeout", type=float, help="seconds allowed per pattern")
+    parser.add_argument("--max-states", type=int, help="DFA state budget per pattern")
+    parser.add_argument("--no-minimize", action="store_true", help="keep the unminimized DFA")
+    parser.add_argument("--construction", choices=CONSTRUCTIONS, default="thompson")
+    parser.add_argument("--format", choices=BATCH_OUTPUTS, default="table", help="table: DFA table as JSON; blob: binary automaton in base64; none: stats only")
+    args = parser.parse_args(argv)
+
+    entrada = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    salida = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    fallidos = 0
+    try:
+        for resultado in compile_batch(read_pairs(entrada), args.processes, args.timeout, args.max_states, not args.no_minimize, args.construction, args.format):
+            if not resultado["ok"]:
+                fallidos += 1
+            salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+    return 1 if fallidos else 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:   # Con argumentos es la compilación por lotes; sin ellos, el modo interactivo de siempre.
+        sys.exit(batch_main())
+    main()
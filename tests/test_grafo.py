@@ -0,0 +1,423 @@
+import io
+import json
+import os
+import random
+import signal
+import struct
+import tracemalloc
+
+import pytest
+
+import grafo
+
+
+# ================================ Análisis de expresiones ================================
+
+
+def test_concatenation_binds_tighter_than_union():   # ab|c es (ab)|c y a|bc es a|(bc), con las dos construcciones.
+    for construction in grafo.CONSTRUCTIONS:
+        for regex, aceptadas in (("ab|c", ["ab", "c"]), ("a|bc", ["a", "bc"]), ("ab*|c+a", ["a", "ab", "abb", "ca", "cca"])):
+            automaton = grafo.build_automaton(regex, "abc", construction=construction)
+            for cadena in ("", "a", "b", "c", "ab", "ac", "bc", "abb", "abc", "ca", "cca", "abca"):
+                assert automaton.fullmatch(cadena) == (cadena in aceptadas), (regex, construction, cadena)
+
+def test_malformed_regex():
+    for regex, mensaje in (("(a|", "Missing operand"), ("|a", "Missing operand"), ("a||b", "Missing operand"), ("*a", "Missing operand"),
+                           ("a)", "Unbalanced"), ("(", "Unbalanced"), ("", "Empty"), ("()", "Empty"), ("[ab", "Unterminated")):
+        with pytest.raises(ValueError, match=mensaje):
+            grafo.build_automaton(regex, "ab")
+
+
+# ================================ Clases de caracteres ================================
+
+
+def test_class_members_and_ranges():
+    automaton = grafo.build_automaton("[a-c][^ab]", "abcd")
+    assert automaton.fullmatch("bc")
+    assert automaton.fullmatch("ad")
+    assert not automaton.fullmatch("ab")
+    assert grafo.build_automaton("[a-z]", "ab").fullmatch("b")     # Un rango acepta los símbolos del alfabeto que caen en él.
+
+def test_class_rejects_unknown_symbols():    # Un miembro fuera del alfabeto da el mismo error que fuera de una clase, en lugar de vaciar la clase.
+    for regex in ("ax", "a[xy]", "[^x]"):
+        with pytest.raises(ValueError, match="Symbol x is not in the alphabet"):
+            grafo.build_automaton(regex, "ab")
+    with pytest.raises(ValueError, match="Invalid range z-a"):
+        grafo.build_automaton("[z-a]", "ab")
+    with pytest.raises(ValueError, match="no symbols"):
+        grafo.build_automaton("[x-z]", "ab")
+
+
+# ================================ Tabla compilada ================================
+
+
+def test_compile_dfa_dead_states():  # Los estados desde los que no se llega a aceptación se juntan en el estado muerto 0.
+    dfa = grafo.build_dfa_graph([[1, 3], [2, -1], [-1, -1], [3, 3]], [False, False, True, False], ["a", "b"])
+    compiled = grafo.compile_dfa(dfa, ["a", "b"])
+    assert compiled.get_num_states() == 4   # Muerto, A, B y C; D no puede aceptar.
+    assert compiled.fullmatch("aa")
+    assert not compiled.fullmatch("ab")
+    assert not compiled.fullmatch("baa")
+
+def test_compile_dfa_long_chain():   # Una cadena larga de estados (literal) tiene que compilar completa y en tiempo lineal.
+    automaton = grafo.build_automaton("abcd" * 1000, "abcd")
+    compiled = automaton.get_compiled()
+    assert compiled.get_num_states() == 4002
+    assert compiled.fullmatch("abcd" * 1000)
+    assert not compiled.fullmatch("abcd" * 999)
+
+
+# ================================ Cerraduras ================================
+
+
+def test_deeply_nested_stars():  # Las cerraduras son iterativas: miles de estrellas anidadas no llegan al límite de recursión.
+    regex = "(" * 3000 + "a" + ")*" * 3000
+    for construction in grafo.CONSTRUCTIONS:
+        automaton = grafo.build_automaton(regex, "a", construction=construction)
+        assert automaton.fullmatch("")
+        assert automaton.fullmatch("aaaa")
+        assert not automaton.fullmatch("ab")
+    assert grafo.build_automaton(regex, "a", engine="nfa").fullmatch("aaa")
+
+def test_closure_engine_cache():     # La segunda cerradura del mismo estado sale del cache.
+    engine = grafo.Closure_Engine(grafo.regex_to_nfa("(a|b)*", list("ab")))
+    primera = engine.state_closure(0)
+    assert engine.state_closure(0) == primera
+    assert engine.get_stats()["closure_hits"] >= 1
+
+
+# ================================ Construcción directa (Glushkov) ================================
+
+
+def random_regex(aleatorio, profundidad):    # Expresión aleatoria sobre abc con clases, |, concatenación, * y +.
+    if profundidad == 0 or aleatorio.random() < 0.25:
+        return aleatorio.choice(["a", "b", "c", "[ab]", "[^a]", "[a-c]"])
+    operacion = aleatorio.choice(["|", "·", "*", "+"])
+    if operacion in "*+":
+        return "(" + random_regex(aleatorio, profundidad - 1) + ")" + operacion
+    separador = "|" if operacion == "|" else ""
+    return "(" + random_regex(aleatorio, profundidad - 1) + separador + random_regex(aleatorio, profundidad - 1) + ")"
+
+def test_glushkov_equivalent_to_thompson():  # El DFA directo de Glushkov acepta el mismo lenguaje que el de Thompson + subconjuntos (get_cerraduras).
+    aleatorio = random.Random(2024)
+    for _ in range(300):
+        regex = random_regex(aleatorio, 4)
+        representantes = grafo.Symbol_Classes([grafo.tokenize(regex, list("abc"))], list("abc")).get_representantes()
+        thompson = grafo.build_automaton(regex, "abc", minimize=False)
+        glushkov = grafo.build_automaton(regex, "abc", construction="glushkov")
+        assert grafo.equivalent_dfa(thompson.get_dfa(), glushkov.get_dfa(), representantes), regex
+        assert grafo.equivalent_dfa(thompson.get_dfa(), glushkov.get_minimized_dfa(), representantes), regex
+
+def test_equivalent_dfa_detects_difference():
+    uno = grafo.build_automaton("a*", "a")
+    otro = grafo.build_automaton("a+", "a", construction="glushkov")
+    assert not grafo.equivalent_dfa(uno.get_dfa(), otro.get_dfa(), ["a"])
+
+
+# ================================ Motores ================================
+
+
+def test_compile_default_engine_is_dfa():    # Aunque el DFA sea grande, compile() sin engine usa el DFA completo y tiene todos los métodos.
+    grafo.clear_compile_cache()
+    automaton = grafo.compile("(a|b)*a" + "(a|b)" * 11, "ab")
+    assert automaton.get_engine() == "dfa"
+    assert list(automaton.iter_lines(b"ab\nbbbbbbbbbbbb\n", search=True)) == [(0, False), (1, False)]
+
+def test_dfa_only_methods_name_engine():     # Con otro motor los métodos que necesitan la tabla dan un error que dice qué motor se eligió.
+    automaton = grafo.build_automaton("(a|b)*a" + "(a|b)" * 14, "ab", engine="auto")
+    assert automaton.get_engine() == "lazy"
+    for llamada in (lambda: automaton.iter_lines(b"ab\n"), lambda: automaton.iter_match_ends(b"ab"), lambda: automaton.encode_batch(["ab"]), lambda: automaton.save("/dev/null")):
+        with pytest.raises(ValueError, match="lazy"):
+            llamada()
+
+def test_lazy_fallback_with_classes():  # Con el cache vaciándose todo el tiempo el DFA perezoso termina simulando el NFA, cuyas transiciones son representantes de clases.
+    regex = "((cd|d)|([cbda])*)+"
+    lazy = grafo.build_automaton(regex, "abcd", engine="lazy").get_compiled()
+    lazy.max_states = 3
+    lazy.max_flushes = 1
+    dfa = grafo.build_automaton(regex, "abcd").get_compiled()
+    assert lazy.fullmatch("bdabb")
+    assert lazy.match("bdabb") == 5
+    aleatorio = random.Random(12)
+    for _ in range(200):
+        cadena = "".join(aleatorio.choice("abcdx") for _ in range(aleatorio.randint(0, 12)))
+        assert lazy.fullmatch(cadena) == dfa.fullmatch(cadena)
+        assert lazy.match(cadena) == dfa.match(cadena)
+    assert lazy.get_stats()["fallbacks"] > 0
+
+
+# ================================ Impresión y exportación ================================
+
+
+def test_print_expands_classes():    # Las transiciones sobre representantes de clases se imprimen con cada símbolo de la clase.
+    automaton = grafo.build_automaton("[ab]c", "abc")
+    assert str(automaton.get_dfa()).splitlines()[0] == "A => [(B, 'a'), (B, 'b')] Start"
+    assert str(automaton.get_nfa()).splitlines()[0] == "0 => [(1, 'a'), (1, 'b')] Start"
+    assert str(automaton.get_compiled()).splitlines()[0] == "A => [(B, 'a'), (B, 'b')] Start"
+    glushkov = grafo.build_automaton("[ab]c", "abc", construction="glushkov")
+    assert str(glushkov.get_minimized_dfa()).splitlines()[0] == "A => [(B, 'a'), (B, 'b')] Start"
+
+def test_export_json_expands_classes():
+    alfabeto = "abcdefghijklmnopqrstuvwxyz"
+    automaton = grafo.build_automaton("[a-z]+", alfabeto)
+    salida = io.StringIO()
+    automaton.export(salida, "json", "minimized")
+    conexiones = json.loads(salida.getvalue())["edges"]
+    assert sorted(c for origen, destino, c in conexiones if origen == "A") == list(alfabeto)
+    cargado = grafo.load_automaton(grafo.dump_automaton(automaton.get_compiled(), automaton.get_nfa(), automaton.regex))
+    assert "(1, 'z')" in str(cargado.get_nfa())
+
+
+# ================================ Prefiltro de literales ================================
+
+
+def test_iter_lines_literal_across_chunks():     # Las líneas y el literal obligatorio pueden quedar partidos entre trozos de cualquier tamaño.
+    automaton = grafo.build_automaton("ab(c|d)*e", "abcdex")
+    assert automaton.get_compiled().required_bytes
+    aleatorio = random.Random(8)
+    lineas = ["".join(aleatorio.choice("abcdex") for _ in range(aleatorio.randint(0, 30))) for _ in range(80)]
+    datos = "\n".join(lineas).encode()
+    esperado = [(i, automaton.search(linea) is not None) for i, linea in enumerate(lineas)]
+    for chunk_size in (1, 2, 3, 7, 64, 65536):
+        assert list(automaton.iter_lines(datos, search=True, chunk_size=chunk_size)) == esperado
+
+def test_iter_lines_literal_long_line_memory():  # Una línea mucho más larga que un trozo no se guarda completa en memoria.
+    automaton = grafo.build_automaton("ab(c|d)*e", "abcde")
+    datos = b"a" * (1 << 20) + b"abce\n" + b"b" * (1 << 20)
+    tracemalloc.start()
+    try:
+        assert list(automaton.iter_lines(datos, search=True)) == [(0, True), (1, False)]
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert pico < 1 << 20
+
+
+# ================================ Lectura por trozos y búsqueda sin ancla ================================
+
+
+def test_iter_lines_fullmatch_across_chunks():   # Sin search cada línea tiene que ser aceptada completa, aunque quede partida entre trozos.
+    automaton = grafo.build_automaton("(a|b)*abb", "ab")
+    aleatorio = random.Random(3)
+    lineas = ["".join(aleatorio.choice("abx") for _ in range(aleatorio.randint(0, 12))) for _ in range(60)]
+    datos = "\n".join(lineas).encode()
+    esperado = [(i, automaton.fullmatch(linea)) for i, linea in enumerate(lineas)]
+    for chunk_size in (1, 2, 5, 64, 65536):
+        assert list(automaton.iter_lines(datos, chunk_size=chunk_size)) == esperado
+        assert list(automaton.iter_lines(io.BytesIO(datos), chunk_size=chunk_size)) == esperado
+
+def test_iter_lines_from_path(tmp_path):     # Una ruta se lee con mmap; un archivo vacío no tiene líneas.
+    automaton = grafo.build_automaton("(a|b)*abb", "ab")
+    ruta = tmp_path / "lineas.txt"
+    ruta.write_bytes(b"abb\nba\nxxabbx")
+    assert list(automaton.iter_lines(str(ruta))) == [(0, True), (1, False), (2, False)]
+    assert list(automaton.iter_lines(str(ruta), search=True)) == [(0, True), (1, False), (2, True)]
+    ruta.write_bytes(b"")
+    assert list(automaton.iter_lines(str(ruta))) == []
+
+def test_iter_match_ends():  # Cada posición en la que termina algún match, igual que buscar en cada prefijo.
+    automaton = grafo.build_automaton("a(b|c)*a", "abc")
+    aleatorio = random.Random(5)
+    cadena = "".join(aleatorio.choice("abcx") for _ in range(300))
+    esperado = [fin for fin in range(len(cadena) + 1) if any(automaton.fullmatch(cadena[i:fin]) for i in range(fin + 1))]
+    for chunk_size in (1, 7, 65536):
+        assert list(automaton.iter_match_ends(cadena.encode(), chunk_size=chunk_size)) == esperado
+    assert list(grafo.build_automaton("a*", "a").iter_match_ends(b"ba")) == [0, 1, 2]   # Acepta la cadena vacía.
+
+def test_unanchored_states_are_bounded():    # Σ*R de a(a|b){16} tiene más de 2^16 estados; se construyen solo los que usa la entrada, hasta max_states.
+    automaton = grafo.build_automaton("a" + "(a|b)" * 16, "ab")
+    sin_ancla = automaton.get_compiled().unanchored()
+    sin_ancla.max_states = 100
+    aleatorio = random.Random(2)
+    cadena = "".join(aleatorio.choice("ab") for _ in range(3000))
+    lineas = [cadena[i:i + 40] for i in range(0, len(cadena), 40)]
+    esperado = [(i, automaton.search(linea) is not None) for i, linea in enumerate(lineas)]
+    assert list(automaton.iter_lines("\n".join(lineas).encode(), search=True)) == esperado
+    esperado = [fin for fin in range(17, len(cadena) + 1) if cadena[fin - 17] == "a"]
+    assert list(automaton.iter_match_ends(cadena.encode())) == esperado
+    assert sin_ancla.get_stats()["flushes"] > 0
+    assert sin_ancla.get_num_states() <= 100
+
+
+# ================================ Búsqueda por lotes (NumPy) ================================
+
+
+def test_fullmatch_batch_str_and_bytes():    # Cadenas de distinto largo (rellenadas con -1), vacías y con símbolos fuera del alfabeto.
+    pytest.importorskip("numpy")
+    automaton = grafo.build_automaton("(a|b)*abb", "ab")
+    cadenas = ["abb", "", "babb", "ab", "xabb", "aabbabb"]
+    esperado = [automaton.fullmatch(c) for c in cadenas]
+    assert automaton.fullmatch_batch(cadenas).tolist() == esperado
+    assert automaton.fullmatch_batch([c.encode() for c in cadenas]).tolist() == esperado
+    codigos = automaton.encode_batch(cadenas)
+    assert codigos.shape == (6, 7)
+    assert (codigos[1] == -1).all()
+    assert (codigos[0, 3:] == -1).all()
+    assert codigos[4, 0] == automaton.get_compiled().width - 1   # Fuera del alfabeto: la última columna.
+    assert automaton.fullmatch_batch(codigos).tolist() == esperado
+
+def test_fullmatch_batch_unicode():  # Alfabetos con símbolos de más de 16 bits usan la búsqueda binaria en lugar de la tabla directa.
+    pytest.importorskip("numpy")
+    for alfabeto in ("añ", "a\U0001F600"):
+        otro = alfabeto[1]
+        automaton = grafo.build_automaton("a" + otro + "*", alfabeto)
+        cadenas = ["a", "a" + otro * 3, otro, "ab", "a" + otro + "a"]
+        assert automaton.fullmatch_batch(cadenas).tolist() == [automaton.fullmatch(c) for c in cadenas]
+
+def test_fullmatch_batch_empty():
+    pytest.importorskip("numpy")
+    automaton = grafo.build_automaton("a*", "a")
+    assert automaton.encode_batch([]).shape == (0, 0)
+    assert automaton.fullmatch_batch([]).tolist() == []
+    assert automaton.fullmatch_batch(["", ""]).tolist() == [True, True]
+
+
+# ================================ Conjuntos de patrones ================================
+
+
+def test_pattern_set_matches_each_pattern():     # fullmatch y search dan, en tupla ordenada, los mismos patrones que compilar cada uno por separado.
+    patrones = ["(a|b)*abb", "b+", "a[bc]*", "c"]
+    conjunto = grafo.compile_set(patrones, "abc")
+    separados = [grafo.build_automaton(p, "abc") for p in patrones]
+    aleatorio = random.Random(4)
+    for _ in range(200):
+        cadena = "".join(aleatorio.choice("abcx") for _ in range(aleatorio.randint(0, 10)))
+        assert conjunto.fullmatch(cadena) == tuple(i for i, a in enumerate(separados) if a.fullmatch(cadena))
+        assert conjunto.search(cadena) == tuple(i for i, a in enumerate(separados) if a.search(cadena) is not None)
+
+def test_pattern_set_empty_and_processes():  # La cadena vacía, un patrón que la acepta, y la construcción en paralelo.
+    conjunto = grafo.compile_set(["a*", "b"], "ab", processes=2)
+    assert conjunto.fullmatch("") == (0,)
+    assert conjunto.search("") == (0,)
+    assert conjunto.search("xbx") == (0, 1)
+    assert conjunto.fullmatch("ab") == ()
+
+
+# ================================ Estadísticas ================================
+
+
+def test_compile_stats():
+    stats = grafo.build_automaton("(a|b)*abb", "ab").get_stats()
+    assert list(stats.get_stages()) == ["parse", "thompson", "subset", "minimize", "compile"]
+    assert stats.get_total_time() == pytest.approx(sum(stats.get_stages().values()))
+    assert (stats.nfa_vertices, stats.dfa_states, stats.minimized_states) == (14, 5, 4)
+    assert 0 <= stats.get_hit_rate("move") <= 1
+    assert stats.get_peak_memory() is None and stats.get_profile() is None
+    datos = json.loads(json.dumps(stats.to_dict()))
+    assert datos["engine"] == "dfa" and datos["minimized_states"] == 4
+    assert "DFA states: 5 (4 minimized)" in str(stats)
+    glushkov = grafo.build_automaton("(a|b)*abb", "ab", construction="glushkov").get_stats()
+    assert "positions" in glushkov.get_stages() and glushkov.get_hit_rate() is None    # Sin NFA no hay Closure_Engine.
+
+def test_stats_hook():   # Se llama una vez por autómata construido, no cuando compile() sale del cache.
+    vistos = []
+    grafo.add_stats_hook(vistos.append)
+    try:
+        grafo.clear_compile_cache()
+        primero = grafo.compile("a+b", "ab")
+        grafo.compile("a+b", "ab")
+    finally:
+        grafo.remove_stats_hook(vistos.append)
+    assert vistos == [primero.get_stats()]
+    grafo.build_automaton("a+b", "ab")
+    assert len(vistos) == 1
+
+def test_profile_compile():  # Con tracemalloc y cProfile; si tracemalloc ya estaba activo, lo deja activo.
+    stats = grafo.profile_compile("(a|b)*abb", "ab").get_stats()
+    assert stats.get_peak_memory() > 0
+    assert "(compile_dfa)" in stats.get_profile(limit=None)     # Todas las funciones: el orden de las primeras cambia entre corridas.
+    assert not tracemalloc.is_tracing()
+    tracemalloc.start()
+    try:
+        stats = grafo.profile_compile("(a|b)*abb", "ab", profile=False).get_stats()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    assert stats.get_peak_memory() > 0 and stats.get_profile() is None
+
+
+# ================================ Serialización ================================
+
+
+def dump_with(datos, offset, valor):     # Copia de un archivo con el entero de 32 bits en offset cambiado y el checksum recalculado, para simular un archivo mal escrito pero íntegro.
+    datos = bytearray(datos)
+    struct.pack_into("<I", datos, offset, valor)
+    struct.pack_into("<I", datos, grafo.FORMAT_HEADER.size - 4, 0)
+    struct.pack_into("<I", datos, grafo.FORMAT_HEADER.size - 4, grafo.format_checksum(datos[:grafo.FORMAT_HEADER.size], datos[grafo.FORMAT_HEADER.size:]))
+    return bytes(datos)
+
+def test_checksum_covers_header():
+    automaton = grafo.build_automaton("(a|b)*abb", "ab")
+    datos = grafo.dump_automaton(automaton.get_compiled(), automaton.get_nfa(), automaton.regex)
+    assert grafo.load_automaton(datos).fullmatch("babb")
+    roto = bytearray(datos)
+    struct.pack_into("<I", roto, 16, 99)     # Campo de inicio.
+    with pytest.raises(ValueError, match="checksum"):
+        grafo.load_automaton(bytes(roto))
+
+def test_load_checks_ranges():   # Con el checksum correcto, un inicio o un destino fuera de la tabla también se rechazan.
+    automaton = grafo.build_automaton("(a|b)*abb", "ab")
+    datos = grafo.dump_automaton(automaton.get_compiled())
+    with pytest.raises(ValueError, match="Corrupt"):
+        grafo.load_automaton(dump_with(datos, 16, 99))
+    tabla = grafo.FORMAT_HEADER.size + grafo.align(len("ab"))   # La tabla va después del alfabeto (sin regex).
+    with pytest.raises(ValueError, match="Corrupt"):
+        grafo.load_automaton(dump_with(datos, tabla + 4, 99))
+
+
+# ================================ Compilación por lotes ================================
+
+
+def crashing_task(alfabeto, regex, *opciones):   # compile_task que mata a su proceso con la expresión "boom", como un proceso que se queda sin memoria.
+    if regex == "boom":
+        os._exit(3)
+    return COMPILE_TASK(alfabeto, regex, *opciones)
+
+COMPILE_TASK = grafo.compile_task
+
+def test_batch_worker_crash_only_fails_culprit(monkeypatch):     # Los pares que estaban en el mismo pool que el que mató a su proceso se compilan bien.
+    monkeypatch.setattr(grafo, "compile_task", crashing_task)
+    pares = [("ab", "(a|b)*a" + "(a|b)" * (i % 6)) for i in range(32)]
+    pares.insert(10, ("ab", "boom"))
+    resultados = list(grafo.compile_batch(pares, processes=3, output="none"))
+    assert [r["index"] for r in resultados] == list(range(len(pares)))
+    assert [r["index"] for r in resultados if not r["ok"]] == [10]
+
+def test_batch_dedup_store_is_bounded(monkeypatch):  # Un par repetido solo se vuelve a compilar cuando ya salió de los últimos BATCH_RECENT resultados.
+    llamadas = []
+    def counting_task(alfabeto, regex, *opciones):
+        llamadas.append(regex)
+        return COMPILE_TASK(alfabeto, regex, *opciones)
+    monkeypatch.setattr(grafo, "compile_task", counting_task)
+    monkeypatch.setattr(grafo, "BATCH_RECENT", 8)
+    for distintos, compilados in ((8, 8), (9, 90)):     # Con 9 pares en ciclo, cada uno ya se olvidó cuando vuelve a aparecer.
+        del llamadas[:]
+        pares = [("ab", "a" * (i % distintos + 1)) for i in range(90)]
+        resultados = list(grafo.compile_batch(pares, output="none"))
+        assert [r["states"] for r in resultados] == [len(regex) + 2 for alfabeto, regex in pares]
+        assert len(llamadas) == compilados
+
+def test_batch_pool_dedup():     # En el pool los repetidos dan el mismo resultado en el orden de entrada.
+    pares = [("ab", "a" * (i % 5 + 1)) for i in range(40)]
+    resultados = list(grafo.compile_batch(pares, processes=2, output="none"))
+    assert [r["index"] for r in resultados] == list(range(40))
+    assert [r["states"] for r in resultados] == [len(regex) + 2 for alfabeto, regex in pares]
+
+@pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="needs setitimer")
+def test_compile_task_restores_alarm():  # El manejador de SIGALRM y el timer de quien llama quedan como estaban, también cuando se agota el tiempo.
+    sonadas = []
+    anterior = signal.signal(signal.SIGALRM, lambda signum, frame: sonadas.append(signum))
+    propio = signal.getsignal(signal.SIGALRM)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, 30)
+        assert grafo.compile_task("ab", "(a|b)*abb", timeout=5)["ok"]
+        assert signal.getsignal(signal.SIGALRM) is propio
+        assert 20 < signal.getitimer(signal.ITIMER_REAL)[0] <= 30
+        resultado = grafo.compile_task("ab", "(a|b)*a" + "(a|b)" * 18, timeout=0.01)
+        assert resultado["error"] == "TimeoutError: compile timed out"
+        assert signal.getsignal(signal.SIGALRM) is propio
+        assert 20 < signal.getitimer(signal.ITIMER_REAL)[0] <= 30
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, anterior)
+    assert not sonadas